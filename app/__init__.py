@@ -1,6 +1,10 @@
+import os
+import secrets
 from flask import Flask
 from flask_login import LoginManager
+from jinja2 import FileSystemBytecodeCache
 from .db import database
+from .db import audit
 
 login_manager = LoginManager()
 login_manager.login_view = "main.login"
@@ -8,9 +12,15 @@ login_manager.login_view = "main.login"
 def create_app(test_config=None):
     app = Flask(__name__)
     if test_config is None:    
-        app.config["SECRET_KEY"] = '123'
+        app.config["SECRET_KEY"] = os.environ.get("SECRET_KEY")
+        if not app.config["SECRET_KEY"]:
+            print("Aviso: SECRET_KEY no definida, se genera una clave temporal para este proceso.")
+            app.config["SECRET_KEY"] = secrets.token_hex(32)
+        app.config["DATABASE_URL"] = os.environ.get("DATABASE_URL", database.DATABASE_FILE)
     else:
         app.config.update(test_config)
+    database_url = app.config.get("DATABASE_URL")
+    app.extensions["bank_engine"] = database.create_engine(database_url, cache_size=app.config.get("ACCOUNT_CACHE_SIZE", 10000), coherence=app.config.get("ACCOUNT_CACHE_COHERENCE", "shared")) if database_url else database.engine
     login_manager.init_app(app)
 
     @login_manager.user_loader
@@ -19,4 +29,21 @@ def create_app(test_config=None):
 
     from .app import main as main_blueprint
     app.register_blueprint(main_blueprint)
+    from .api import api as api_blueprint
+    app.register_blueprint(api_blueprint)
+    if not app.testing:
+        boot(app)
+    return app
+
+def boot(app):
+    engine = app.extensions["bank_engine"]
+    database.ensure_schema(engine)
+    audit_dir = app.config.get("AUDIT_DIR") or os.environ.get("AUDIT_DIR")
+    if audit_dir:
+        engine.journal = audit.AuditJournal(audit_dir, (app.config.get("AUDIT_KEY") or os.environ.get("AUDIT_KEY", "")).encode())
+    cache_dir = app.config.get("JINJA_CACHE_DIR") or os.path.join(app.instance_path, "jinja_cache")
+    os.makedirs(cache_dir, exist_ok=True)
+    app.jinja_options = {**app.jinja_options, "bytecode_cache": FileSystemBytecodeCache(cache_dir)}
+    for template_name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(template_name)
     return app
\ No newline at end of file
@@ -0,0 +1,172 @@
+from flask import Blueprint, jsonify, request
+from flask_login import current_user
+from werkzeug.exceptions import HTTPException
+from .db import database
+from .utils.utils import is_valid_input, validar_nombre
+from functools import wraps
+import math
+import sqlite3
+
+api = Blueprint('api', __name__, url_prefix='/api')
+
+MAX_PAGE_SIZE = 1000
+MAX_BATCH_SIZE = 1000
+RETRY_AFTER_SECONDS = 1
+SQLITE_BUSY_CODES = (5, 6)
+
+class ApiError(Exception):
+    def __init__(self, status, code, message):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+def error_response(status, code, message, **details):
+    return jsonify({"error": {"code": code, "message": message, **details}}), status
+@api.errorhandler(ApiError)
+def handle_api_error(e):
+    return error_response(e.status, e.code, str(e))
+@api.errorhandler(database.ItemNotFoundError)
+def handle_not_found(e):
+    return error_response(404, "not_found", str(e), **_operation_details(e))
+@api.errorhandler(database.DuplicateItemError)
+def handle_duplicate(e):
+    return error_response(409, "duplicate", str(e), **_operation_details(e))
+@api.errorhandler(ValueError)
+def handle_invalid(e):
+    return error_response(400, "invalid", str(e), **_operation_details(e))
+@api.errorhandler(database.DatabaseConnectionError)
+@api.errorhandler(sqlite3.Error)
+def handle_database_error(e):
+    print(f"Error de base de datos en la API: {e}")
+    cause = e if isinstance(e, sqlite3.Error) else e.__context__
+    busy = isinstance(cause, sqlite3.OperationalError) and (getattr(cause, "sqlite_errorcode", None) or 0) & 0xFF in SQLITE_BUSY_CODES
+    if isinstance(e, database.DatabaseConnectionError) or busy:
+        response, status = error_response(503, "database_error", "La base de datos no esta disponible, intentalo de nuevo.")
+        return response, status, {"Retry-After": str(RETRY_AFTER_SECONDS)}
+    return error_response(500, "database_error", "Error en la base de datos.")
+@api.errorhandler(Exception)
+def handle_unexpected(e):
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e.__context__, sqlite3.Error):
+        return handle_database_error(e)
+    print(f"Error inesperado en la API: {e}")
+    return error_response(500, "internal_error", "Error interno del servidor.")
+def _operation_details(e):
+    index = getattr(e, "operation_index", None)
+    return {} if index is None else {"operation_index": index}
+
+def api_login_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not current_user.is_authenticated:
+            return error_response(401, "unauthorized", "Debes iniciar sesion.")
+        return f(*args, **kwargs)
+    return decorated_function
+def api_admin_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if current_user.role != "admin":
+            return error_response(403, "forbidden", "No tienes permiso para realizar esta accion.")
+        return f(*args, **kwargs)
+    return decorated_function
+def _owner_filter():
+    if current_user.role == "admin":
+        return request.args.get("id_user")
+    return current_user.id
+def _page(table_name, id_user):
+    limit = is_valid_input(request.args.get("limit", 100))
+    if limit is None or not 0 < limit <= MAX_PAGE_SIZE:
+        raise ApiError(400, "invalid", f"El parametro 'limit' debe estar entre 1 y {MAX_PAGE_SIZE}.")
+    after = request.args.get("after")
+    if after is not None and table_name != "user":
+        after = is_valid_input(after)
+        if after is None:
+            raise ApiError(400, "invalid", "El parametro 'after' debe ser un numero valido.")
+    rows, next_after = database.get_page(table_name, id_user, after, limit)
+    return jsonify({"data": rows, "next_after": next_after})
+def _json_list(key):
+    payload = request.get_json(silent=True)
+    items = payload.get(key) if isinstance(payload, dict) else None
+    if not isinstance(items, list) or not items:
+        raise ApiError(400, "invalid", f"El cuerpo debe ser un objeto JSON con una lista '{key}' no vacia.")
+    if len(items) > MAX_BATCH_SIZE:
+        raise ApiError(400, "invalid", f"Un lote admite como maximo {MAX_BATCH_SIZE} elementos.")
+    return items
+def _require_fields(item, index, fields):
+    if not isinstance(item, dict):
+        raise ApiError(400, "invalid", f"El elemento {index} debe ser un objeto JSON.")
+    parsed = dict(item)
+    for field, is_float in fields:
+        value = is_valid_input(item.get(field), is_float=is_float)
+        if value is None or (is_float and not math.isfinite(value)):
+            raise ApiError(400, "invalid", f"El campo '{field}' del elemento {index} no es valido.")
+        parsed[field] = value
+    return parsed
+
+@api.route("/accounts", methods=["GET"])
+@api_login_required
+def list_accounts():
+    return _page("account", _owner_filter())
+@api.route("/accounts/<int:id_account>", methods=["GET"])
+@api_login_required
+def get_account(id_account):
+    account = database.get_account(id_account)
+    if not account or (current_user.role != "admin" and account.user_id != current_user.id):
+        raise database.ItemNotFoundError(f"La cuenta '{id_account}' no existe o no te pertenece")
+    return jsonify({"id_account": account.id, "id_user": account.user_id, "amount": account.balance, "type": account.type})
+@api.route("/accounts/batch", methods=["POST"])
+@api_login_required
+@api_admin_required
+def insert_accounts_batch():
+    accounts = []
+    for index, item in enumerate(_json_list("accounts")):
+        account = _require_fields(item, index, [("amount", True)])
+        if not account.get("id_user") or not account.get("type"):
+            raise ApiError(400, "invalid", f"El elemento {index} necesita 'id_user' y 'type'.")
+        accounts.append(account)
+    created = database.insert_accounts_batch(accounts)
+    return jsonify({"created": created}), 201
+@api.route("/transactions", methods=["GET"])
+@api_login_required
+def list_transactions():
+    return _page("transactions", _owner_filter())
+@api.route("/transactions/batch", methods=["POST"])
+@api_login_required
+def apply_transactions_batch():
+    operations = []
+    for index, item in enumerate(_json_list("operations")):
+        if isinstance(item, dict) and item.get("type") == "transferencia":
+            fields = [("id_account_from", False), ("id_account_to", False), ("amount", True)]
+        else:
+            fields = [("id_account", False), ("amount", True)]
+        operation = _require_fields(item, index, fields)
+        try:
+            cents = database.to_cents(operation["amount"])
+        except ValueError as e:
+            raise ApiError(400, "invalid", f"Elemento {index}: {e}")
+        if cents <= 0:
+            raise ApiError(400, "invalid", f"El monto del elemento {index} debe ser mayor que cero.")
+        operations.append(operation)
+    results = database.apply_operations_batch(operations, current_user.id)
+    return jsonify({"results": results}), 201
+@api.route("/users", methods=["GET"])
+@api_login_required
+@api_admin_required
+def list_users():
+    return _page("user", None)
+@api.route("/users/batch", methods=["POST"])
+@api_login_required
+@api_admin_required
+def register_users_batch():
+    users = []
+    for index, item in enumerate(_json_list("users")):
+        if not isinstance(item, dict) or not all(isinstance(item.get(field), str) and item.get(field) for field in ("id_user", "name", "password")):
+            raise ApiError(400, "invalid", f"El elemento {index} necesita 'id_user', 'name' y 'password'.")
+        validar_nombre(item["name"])
+        users.append(item)
+    created = database.register_users_batch(users)
+    return jsonify({"created": created}), 201
+@api.route("/summary", methods=["GET"])
+@api_login_required
+def summary():
+    return jsonify(database.get_balance_summary(_owner_filter()))
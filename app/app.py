@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
 from .db import database
 from flask_login import login_user, logout_user, login_required, current_user
 from .utils.utils import is_valid_input
@@ -16,7 +16,7 @@ def admin_required(f):
     return decorated_funcion
 @main.route("/")
 def index():
-    valid_tables = ["user", "account", "transactions"] 
+    valid_tables = ["user", "account", "transactions", "standing_orders"] 
     return render_template("index.html", tables_for_select = valid_tables)
 @main.route("/logout")
 @login_required
@@ -70,7 +70,7 @@ def view_table():
     if not table_name:
         flash("No se ha especificado ninguna tabla para ver.")
         return redirect(url_for("main.index"))    
-    if table_name not in ["user", "account", "transactions"]:
+    if table_name not in ["user", "account", "transactions", "standing_orders"]:
         flash("Tabla no válida.", "error")
         return redirect(url_for("main.index"))
     id_user = None
@@ -78,7 +78,7 @@ def view_table():
         if table_name == "user":
             flash("No tienes permiso para ver esta tabla.", "error")
             return redirect(url_for("main.index"))        
-        if table_name in ["account", "transactions"]:
+        if table_name in ["account", "transactions", "standing_orders"]:
             id_user = current_user.id
     try:
         data, column_name, error_message = database.get_table_data(table_name, id_user)
@@ -173,6 +173,7 @@ def insert_transaction():
     id_account = is_valid_input(request.form.get("id_account"))
     amount = is_valid_input(request.form.get("amount"), is_float=True)
     type_transaction = request.form.get("type_transaction")
+    idempotency_key = request.headers.get("Idempotency-Key") or request.form.get("idempotency_key")
     if id_account is None:
         flash("Error: El ID de la cuenta deben ser un número válido.", "error")
         return redirect(url_for("main.index"))
@@ -183,7 +184,7 @@ def insert_transaction():
         flash("Error: Tipo de la transaccion invalido.", "error")
         return redirect(url_for("main.index"))
     try:        
-        database.insert_transaction(id_account, amount, type_transaction, current_user.id)
+        database.insert_transaction(id_account, amount, type_transaction, current_user.id, idempotency_key)
         flash(f"Transaccion de {type_transaction} completada con exito.", "success")
         return redirect(url_for("main.view_table", ver_tabla="transactions"))
     except ValueError as e:
@@ -196,6 +197,71 @@ def insert_transaction():
         print("Error inesperado al insertar la transacción: {e}")
         flash("Ocurrió un error inesperado al insertar la transacción.", "error")
         return redirect(url_for("main.index"))
+@main.route("/transfer/", methods=["POST"])
+@login_required
+def transfer():
+    id_account_from = is_valid_input(request.form.get("id_account_from"))
+    id_account_to = is_valid_input(request.form.get("id_account_to"))
+    amount = is_valid_input(request.form.get("amount"), is_float=True)
+    if id_account_from is None or id_account_to is None:
+        flash("Error: Los ID de las cuentas deben ser números válidos.", "error")
+        return redirect(url_for("main.index"))
+    if amount is None:
+        flash("Error: El monto de la transferencia debe ser un número válido.", "error")
+        return redirect(url_for("main.index"))
+    try:
+        result, message = database.transfer(id_account_from, id_account_to, amount, current_user.id)
+        flash(message, "success")
+        return redirect(url_for("main.view_table", ver_tabla="transactions"))
+    except (ValueError, database.ItemNotFoundError) as e:
+        flash(str(e), "error")
+        return redirect(url_for("main.index"))
+    except Exception as e:
+        print(f"Error inesperado al realizar la transferencia: {e}")
+        flash("Ocurrió un error inesperado al realizar la transferencia.", "error")
+        return redirect(url_for("main.index"))
+@main.route("/standing_order/", methods=["POST"])
+@login_required
+def create_standing_order():
+    id_account_from = is_valid_input(request.form.get("id_account_from"))
+    id_account_to = is_valid_input(request.form.get("id_account_to"))
+    amount = is_valid_input(request.form.get("amount"), is_float=True)
+    interval_days = is_valid_input(request.form.get("interval_days"))
+    if id_account_from is None or id_account_to is None:
+        flash("Error: Los ID de las cuentas deben ser números válidos.", "error")
+        return redirect(url_for("main.index"))
+    if amount is None or interval_days is None:
+        flash("Error: El monto y la periodicidad deben ser números válidos.", "error")
+        return redirect(url_for("main.index"))
+    try:
+        result, message = database.create_standing_order(current_user.id, id_account_from, id_account_to, amount, interval_days * 24 * 60 * 60)
+        flash(message, "success")
+        return redirect(url_for("main.view_table", ver_tabla="standing_orders"))
+    except (ValueError, database.ItemNotFoundError) as e:
+        flash(str(e), "error")
+        return redirect(url_for("main.index"))
+    except Exception as e:
+        print(f"Error inesperado al crear la orden permanente: {e}")
+        flash("Ocurrió un error inesperado al crear la orden permanente.", "error")
+        return redirect(url_for("main.index"))
+@main.route("/cancel_standing_order/", methods=["POST"])
+@login_required
+def cancel_standing_order():
+    id_order = is_valid_input(request.form.get("id_order"))
+    if id_order is None:
+        flash("Error: El ID de la orden debe ser un número válido.", "error")
+        return redirect(url_for("main.index"))
+    try:
+        result, message = database.cancel_standing_order(id_order, current_user.id, current_user.role)
+        flash(message, "success")
+        return redirect(url_for("main.view_table", ver_tabla="standing_orders"))
+    except database.ItemNotFoundError as e:
+        flash(str(e), "error")
+        return redirect(url_for("main.index"))
+    except Exception as e:
+        print(f"Error inesperado al cancelar la orden permanente: {e}")
+        flash("Ocurrió un error inesperado al cancelar la orden permanente.", "error")
+        return redirect(url_for("main.index"))
 @main.route("/delete_account/", methods=["POST"])
 @login_required
 def delete_account():
@@ -227,7 +293,7 @@ def update_account():
         flash("Error: El nuevo monto debe ser números válidos.", "error")
         return redirect(url_for("main.index"))
     try:
-        database.update_account(id_account, new_amount)
+        database.update_account(id_account, new_amount, current_user.id)
         flash(f"La cuenta numero '{id_account}' fue actualizada con exito.", "success")
         return redirect(url_for("main.view_table", ver_tabla="account"))
     except database.ItemNotFoundError as e:
@@ -254,7 +320,7 @@ def update_transaction():
         flash("Error: Falta el tipo de transaction.", "error")
         return redirect(url_for("main.index"))
     try:
-        database.update_transaction(id_transaction, new_amount, new_type)
+        database.update_transaction(id_transaction, new_amount, new_type, current_user.id)
         flash(f"La transaccion {id_transaction} fue actualizada con exito.", "success")
         return redirect(url_for("main.view_table", ver_tabla="transactions"))
     except database.ItemNotFoundError as e:
@@ -274,7 +340,7 @@ def delete_transaction():
         flash("Error: El ID de la transacción debe ser un número válido.", "error")
         return redirect(url_for("main.index"))
     try:
-        database.delete_transaction(transaction_id)
+        database.delete_transaction(transaction_id, current_user.id)
         flash(f"La transacción {transaction_id} fue eliminada con éxito.", "success")
         return redirect(url_for("main.view_table", ver_tabla="transactions"))
     except database.ItemNotFoundError as e:
@@ -309,6 +375,46 @@ def profile():
             flash("Ocurrio un error inesperado al actualizar tu perfil.", "error")
             return redirect(url_for("main.profile"))
     return render_template("profile.html")
+@main.route("/accrue_interest/", methods=["POST"])
+@login_required
+@admin_required
+def accrue_interest():
+    from .db import interest
+    account_type = request.form.get("tipo_cuenta")
+    rate = is_valid_input(request.form.get("tasa"), is_float=True)
+    period = request.form.get("periodo")
+    if rate is None:
+        flash("Error: La tasa de interes debe ser un número válido.", "error")
+        return redirect(url_for("main.admin_dashboard"))
+    try:
+        applied, message = interest.accrue_interest(account_type, rate / 100, period)
+        flash(message, "success" if applied else "info")
+        return redirect(url_for("main.view_table", ver_tabla="account"))
+    except ValueError as e:
+        flash(str(e), "error")
+        return redirect(url_for("main.admin_dashboard"))
+    except Exception as e:
+        print(f"Error inesperado al aplicar intereses: {e}")
+        flash("Ocurrió un error inesperado al aplicar los intereses.", "error")
+        return redirect(url_for("main.admin_dashboard"))
+@main.route("/backup/", methods=["POST"])
+@login_required
+@admin_required
+def backup_database():
+    from .db import backup
+    backup_dir = current_app.config.get("BACKUP_DIR", backup.BACKUP_DIR)
+    keep = current_app.config.get("BACKUP_KEEP", backup.BACKUP_KEEP)
+    try:
+        snapshot_path = backup.backup_db(backup_dir, keep)
+        flash(f"Copia de seguridad creada en '{snapshot_path}'.", "success")
+        return redirect(url_for("main.admin_dashboard"))
+    except backup.BackupError as e:
+        flash(str(e), "error")
+        return redirect(url_for("main.admin_dashboard"))
+    except Exception as e:
+        print(f"Error inesperado al crear la copia de seguridad: {e}")
+        flash("Ocurrió un error inesperado al crear la copia de seguridad.", "error")
+        return redirect(url_for("main.admin_dashboard"))
 @main.route("/admin_dashboard/")
 @admin_required
 def admin_dashboard():
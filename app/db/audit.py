@@ -0,0 +1,202 @@
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import namedtuple
+
+OP_INSERT_TRANSACTION = 1
+OP_UPDATE_TRANSACTION = 2
+OP_DELETE_TRANSACTION = 3
+OP_UPDATE_ACCOUNT = 4
+OP_TRANSFER = 5
+OP_NAMES = {
+    OP_INSERT_TRANSACTION: "insert_transaction",
+    OP_UPDATE_TRANSACTION: "update_transaction",
+    OP_DELETE_TRANSACTION: "delete_transaction",
+    OP_UPDATE_ACCOUNT: "update_account",
+    OP_TRANSFER: "transfer",
+}
+TYPE_CODES = {None: 0, "deposito": 1, "retiro": 2, "interes": 3}
+TYPE_NAMES = {code: name for name, code in TYPE_CODES.items()}
+
+MAGIC = b"BANKAUD1"
+RECORD_SIZE = 96
+DIGEST_SIZE = 16
+RECORD_BODY = struct.Struct("<QqBB6xqqqq24s")
+HEADER = struct.Struct("<8sIIQQ16s16s")
+SEGMENT_RECORDS = 1 << 16
+ZERO_DIGEST = bytes(DIGEST_SIZE)
+
+Record = namedtuple("Record", "seq timestamp op type ref_a ref_b amount extra id_user digest")
+
+class AuditError(Exception):
+    pass
+
+def segment_path(directory, index):
+    return os.path.join(directory, f"audit-{index:06d}.log")
+def list_segments(directory):
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(name for name in os.listdir(directory) if name.startswith("audit-") and name.endswith(".log"))
+    return [os.path.join(directory, name) for name in names]
+
+class AuditJournal:
+    def __init__(self, directory, key=b"", segment_records=SEGMENT_RECORDS):
+        self.directory = directory
+        self.key = key
+        self.segment_records = segment_records
+        self._thread_lock = threading.Lock()
+        self._pid = None
+        self._lock_fd = None
+        self._file = None
+        self._map = None
+        self.failures = 0
+        self._hasher = hashlib.blake2b(digest_size=DIGEST_SIZE, key=key)
+        os.makedirs(directory, exist_ok=True)
+        self._open_process()
+    def _open_process(self):
+        self._pid = os.getpid()
+        self._lock_fd = os.open(os.path.join(self.directory, "audit.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        self._file = None
+        self._map = None
+    def _map_segment(self, index, first_seq=1, start_digest=ZERO_DIGEST):
+        path = segment_path(self.directory, index)
+        size = (self.segment_records + 1) * RECORD_SIZE
+        created = not os.path.exists(path)
+        segment_file = open(path, "a+b")
+        if created:
+            segment_file.truncate(size)
+        segment_map = mmap.mmap(segment_file.fileno(), size)
+        if created:
+            segment_map[:HEADER.size] = HEADER.pack(MAGIC, 1, index, first_seq, 0, start_digest, start_digest)
+        elif segment_map[:8] != MAGIC:
+            raise AuditError(f"El segmento '{path}' no es un diario de auditoria valido.")
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+        self._file = segment_file
+        self._map = segment_map
+    def _current_segment(self):
+        if self._map is None:
+            segments = list_segments(self.directory)
+            self._map_segment(int(os.path.basename(segments[-1])[6:12]) if segments else 1)
+        header = HEADER.unpack_from(self._map)
+        while header[4] >= self.segment_records:
+            self._map_segment(header[2] + 1, header[3] + header[4], header[6])
+            header = HEADER.unpack_from(self._map)
+        return header
+    def append(self, op, ref_a=0, ref_b=0, amount=0, extra=0, id_user="", type_name=None):
+        with self._thread_lock:
+            if self._pid != os.getpid():
+                self._open_process()
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            try:
+                _, _, index, first_seq, count, start_digest, last_digest = self._current_segment()
+                seq = first_seq + count
+                body = RECORD_BODY.pack(seq, time.time_ns(), op, TYPE_CODES.get(type_name, 0), ref_a or 0, ref_b or 0, amount or 0, extra or 0, str(id_user or "").encode()[:24])
+                hasher = self._hasher.copy()
+                hasher.update(last_digest + body)
+                digest = hasher.digest()
+                offset = (count + 1) * RECORD_SIZE
+                self._map[offset:offset + RECORD_SIZE] = body + digest
+                HEADER.pack_into(self._map, 0, MAGIC, 1, index, first_seq, count + 1, start_digest, digest)
+                return seq
+            finally:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+    def flush(self):
+        with self._thread_lock:
+            if self._map is not None:
+                self._map.flush()
+    def close(self):
+        with self._thread_lock:
+            if self._map is not None and self._pid == os.getpid():
+                self._map.close()
+                self._file.close()
+                os.close(self._lock_fd)
+            self._map = None
+            self._file = None
+
+def _decode(body, digest):
+    seq, timestamp, op, type_code, ref_a, ref_b, amount, extra, id_user = RECORD_BODY.unpack(body)
+    return Record(seq, timestamp, OP_NAMES.get(op, op), TYPE_NAMES.get(type_code, type_code), ref_a, ref_b, amount, extra, id_user.rstrip(b"\0").decode(errors="replace"), digest.hex())
+def read_records(directory):
+    for path in list_segments(directory):
+        with open(path, "rb") as f:
+            data = f.read()
+        count = HEADER.unpack_from(data)[4]
+        for offset in range(RECORD_SIZE, (count + 1) * RECORD_SIZE, RECORD_SIZE):
+            yield _decode(data[offset:offset + RECORD_BODY.size], data[offset + RECORD_BODY.size:offset + RECORD_SIZE])
+def verify_segment(path, key=b""):
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, _, _, first_seq, count, start_digest, last_digest = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        return first_seq, 0, start_digest, last_digest, f"{path}: cabecera invalida"
+    copy = hashlib.blake2b(digest_size=DIGEST_SIZE, key=key).copy
+    body_size = RECORD_BODY.size
+    digest = start_digest
+    for offset in range(RECORD_SIZE, (count + 1) * RECORD_SIZE, RECORD_SIZE):
+        hasher = copy()
+        hasher.update(digest + data[offset:offset + body_size])
+        digest = hasher.digest()
+        if digest != data[offset + body_size:offset + RECORD_SIZE]:
+            seq = int.from_bytes(data[offset:offset + 8], "little")
+            return first_seq, offset // RECORD_SIZE - 1, start_digest, digest, f"{path}: el registro {seq} fue alterado o no sigue la cadena"
+    if count and (int.from_bytes(data[RECORD_SIZE:RECORD_SIZE + 8], "little") != first_seq or int.from_bytes(data[count * RECORD_SIZE:count * RECORD_SIZE + 8], "little") != first_seq + count - 1):
+        return first_seq, 0, start_digest, digest, f"{path}: la numeracion de los registros no es continua"
+    if digest != last_digest:
+        return first_seq, count, start_digest, digest, f"{path}: la cabecera no coincide con el ultimo registro"
+    return first_seq, count, start_digest, digest, None
+def verify_journal(directory, key=b"", jobs=1):
+    segments = list_segments(directory)
+    if jobs > 1 and len(segments) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(jobs) as pool:
+            results = list(pool.map(verify_segment, segments, [key] * len(segments)))
+    else:
+        results = [verify_segment(path, key) for path in segments]
+    expected_seq = 1
+    previous_digest = ZERO_DIGEST
+    total = 0
+    for path, (first_seq, count, start_digest, last_digest, error) in zip(segments, results):
+        if first_seq != expected_seq or start_digest != previous_digest:
+            return False, total, f"{path}: el segmento no continua la cadena anterior"
+        total += count
+        if error:
+            return False, total, error
+        expected_seq += count
+        previous_digest = last_digest
+    return True, total, "ok"
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog="audit_log.py", description="Lector y verificador del diario de auditoria.")
+    parser.add_argument("command", choices=["verify", "dump", "bench"])
+    parser.add_argument("directory")
+    parser.add_argument("--key", default=os.environ.get("AUDIT_KEY", ""))
+    parser.add_argument("--count", type=int, default=100000, help="Registros a escribir con 'bench'.")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="Procesos para verificar segmentos en paralelo.")
+    args = parser.parse_args(argv)
+    key = args.key.encode()
+    if args.command == "verify":
+        started = time.perf_counter()
+        valid, total, message = verify_journal(args.directory, key, args.jobs)
+        elapsed = time.perf_counter() - started
+        rate = total / elapsed if elapsed else 0
+        print(f"{'OK' if valid else 'FALLO'}: {total} registros verificados en {elapsed:.3f}s ({rate:,.0f}/s). {message}")
+        return 0 if valid else 1
+    if args.command == "dump":
+        for entry in read_records(args.directory):
+            print("\t".join(str(value) for value in entry))
+        return 0
+    bench_journal = AuditJournal(args.directory, key)
+    started = time.perf_counter()
+    for index in range(args.count):
+        bench_journal.append(OP_INSERT_TRANSACTION, index, 1, 100, 100 * index, "bench", "deposito")
+    elapsed = time.perf_counter() - started
+    bench_journal.close()
+    print(f"{args.count} registros en {elapsed:.3f}s ({elapsed / args.count * 1e6:.2f} us por registro)")
+    return 0
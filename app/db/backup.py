@@ -0,0 +1,130 @@
+import os
+import sqlite3
+from datetime import datetime
+from . import database
+
+BACKUP_DIR = "backups"
+BACKUP_PAGES = 256
+BACKUP_SLEEP = 0.005
+BACKUP_KEEP = 7
+JOURNAL_SUFFIXES = ("-journal", "-wal", "-shm")
+
+class BackupError(Exception):
+    pass
+def _snapshot_prefix(db_path):
+    if db_path == ':memory:':
+        return "memory"
+    return os.path.splitext(os.path.basename(db_path))[0]
+def _open_source(engine):
+    db_path = engine.database_file
+    if db_path == ':memory:':
+        if not engine.memory_conn:
+            raise BackupError("No hay una base de datos en memoria activa para respaldar.")
+        return engine.acquire(), False
+    if not os.path.exists(db_path):
+        raise BackupError(f"La base de datos '{db_path}' no existe.")
+    return sqlite3.connect(db_path), True
+def verify_backup(snapshot_path):
+    conn = sqlite3.connect(f"file:{snapshot_path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute("PRAGMA integrity_check").fetchall()
+    except sqlite3.DatabaseError as e:
+        return False, f"Error al verificar la copia: {e}"
+    finally:
+        conn.close()
+    if rows == [("ok",)]:
+        return True, "ok"
+    return False, "; ".join(row[0] for row in rows)
+def list_backups(backup_dir=BACKUP_DIR, prefix=None):
+    if not os.path.isdir(backup_dir):
+        return []
+    names = [name for name in os.listdir(backup_dir) if name.endswith(".db")]
+    if prefix:
+        names = [name for name in names if name.startswith(f"{prefix}-")]
+    return [os.path.join(backup_dir, name) for name in sorted(names)]
+def prune_backups(backup_dir=BACKUP_DIR, keep=BACKUP_KEEP, prefix=None):
+    snapshots = list_backups(backup_dir, prefix)
+    removed = snapshots[:-keep] if keep > 0 else []
+    for path in removed:
+        os.remove(path)
+    return removed
+def backup_db(backup_dir=BACKUP_DIR, keep=BACKUP_KEEP, pages=BACKUP_PAGES, sleep=BACKUP_SLEEP):
+    engine = database.current_engine()
+    prefix = _snapshot_prefix(engine.database_file)
+    os.makedirs(backup_dir, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    snapshot_path = os.path.join(backup_dir, f"{prefix}-{stamp}.db")
+    partial_path = snapshot_path + ".part"
+    source, owns_source = _open_source(engine)
+    target = sqlite3.connect(partial_path)
+    try:
+        source.backup(target, pages=pages, sleep=sleep)
+    except sqlite3.Error as e:
+        target.close()
+        os.remove(partial_path)
+        raise BackupError(f"Error al respaldar la base de datos: {e}")
+    finally:
+        if owns_source:
+            source.close()
+        else:
+            engine.release(source, True)
+    target.close()
+    valid, message = verify_backup(partial_path)
+    if not valid:
+        os.remove(partial_path)
+        raise BackupError(f"La copia de seguridad no paso la verificacion: {message}")
+    os.replace(partial_path, snapshot_path)
+    prune_backups(backup_dir, keep, prefix)
+    return snapshot_path
+def _replace_offline(restore_path, db_path):
+    guard = None
+    if os.path.exists(db_path):
+        guard = sqlite3.connect(db_path, timeout=0, isolation_level=None)
+        try:
+            guard.execute("BEGIN EXCLUSIVE")
+        except sqlite3.OperationalError:
+            guard.close()
+            os.remove(restore_path)
+            raise BackupError(f"La base de datos '{db_path}' esta en uso. Detenga la aplicacion antes de restaurar.")
+    try:
+        for suffix in JOURNAL_SUFFIXES:
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+        os.replace(restore_path, db_path)
+    finally:
+        if guard is not None:
+            guard.close()
+def restore_backup(snapshot_path, db_path=None):
+    if not os.path.exists(snapshot_path):
+        raise BackupError(f"La copia '{snapshot_path}' no existe.")
+    valid, message = verify_backup(snapshot_path)
+    if not valid:
+        raise BackupError(f"La copia '{snapshot_path}' esta danada: {message}")
+    engine = database.current_engine()
+    db_path = db_path or engine.database_file
+    source = sqlite3.connect(f"file:{snapshot_path}?mode=ro", uri=True)
+    try:
+        if db_path == ':memory:':
+            conn = engine.acquire()
+            try:
+                source.backup(conn)
+            finally:
+                engine.release(conn, True)
+            engine.account_cache.clear()
+            return True, "Copia restaurada en la base de datos en memoria."
+        restore_path = db_path + ".restore"
+        target = sqlite3.connect(restore_path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+        if db_path == engine.database_file:
+            engine.close()
+        _replace_offline(restore_path, db_path)
+        if db_path == engine.database_file:
+            engine.open(db_path)
+        return True, f"Copia restaurada en '{db_path}'."
+    except sqlite3.Error as e:
+        raise BackupError(f"Error al restaurar la copia: {e}")
+    finally:
+        source.close()
@@ -0,0 +1,148 @@
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+ACCOUNT_CACHE_SIZE = 10000
+COHERENCE_MODES = ("local", "shared")
+FORMAT_VERSION_OFFSET = 18
+CHANGE_COUNTER_OFFSET = 24
+WAL_FORMAT = 2
+
+class CachedAccount:
+    __slots__ = ("id_account", "id_user", "amount", "type", "sequence")
+    def __init__(self, id_account, id_user, amount, acc_type, sequence=0):
+        self.id_account = id_account
+        self.id_user = id_user
+        self.amount = amount
+        self.type = acc_type
+        self.sequence = sequence
+
+class AccountCache:
+    def __init__(self, max_size=ACCOUNT_CACHE_SIZE, coherence="shared"):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._database_file = None
+        self._probe = None
+        self._probe_pid = None
+        self._version_probe = None
+        self._wal = False
+        self._change_counter = None
+        self._sequence = 0
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.configure(max_size, coherence)
+    def configure(self, max_size=ACCOUNT_CACHE_SIZE, coherence="shared"):
+        if coherence not in COHERENCE_MODES:
+            raise ValueError(f"Modo de coherencia '{coherence}' no valido.")
+        with self._lock:
+            self.max_size = max_size
+            self.coherence = coherence
+            self._reset()
+    def bind(self, database_file):
+        with self._lock:
+            if database_file != self._database_file:
+                self._database_file = database_file
+                self._reset()
+    def _reset(self):
+        self._clear()
+        if self._probe is not None and self._probe_pid == os.getpid():
+            os.close(self._probe)
+            if self._version_probe is not None:
+                self._version_probe.close()
+        self._probe = None
+        self._version_probe = None
+        self._wal = False
+        self._change_counter = None
+    def _read_change_counter(self):
+        if self.coherence != "shared" or not self._database_file or self._database_file == ':memory:':
+            return None
+        if self._probe is None or self._probe_pid != os.getpid():
+            if not os.path.exists(self._database_file):
+                return None
+            self._probe = os.open(self._database_file, os.O_RDONLY)
+            self._probe_pid = os.getpid()
+            self._version_probe = None
+            self._change_counter = None
+        header = os.pread(self._probe, CHANGE_COUNTER_OFFSET + 4 - FORMAT_VERSION_OFFSET, FORMAT_VERSION_OFFSET)
+        wal = header[:1] == bytes([WAL_FORMAT])
+        if wal != self._wal:
+            self._wal = wal
+            self._change_counter = None
+        if not wal:
+            return int.from_bytes(header[CHANGE_COUNTER_OFFSET - FORMAT_VERSION_OFFSET:], "big")
+        if self._version_probe is None:
+            self._version_probe = sqlite3.connect(self._database_file, check_same_thread=False)
+        return self._version_probe.execute("PRAGMA data_version").fetchone()[0]
+    def _check_coherence(self):
+        change_counter = self._read_change_counter()
+        if change_counter is not None and change_counter != self._change_counter:
+            self._clear()
+            self._change_counter = change_counter
+        return change_counter
+    def before_commit(self):
+        with self._lock:
+            return self._check_coherence()
+    def after_commit(self, change_counter):
+        if change_counter is None or self._wal:
+            return
+        with self._lock:
+            if self._change_counter == change_counter:
+                self._change_counter = (change_counter + 1) & 0xFFFFFFFF
+    def _clear(self):
+        self._entries.clear()
+        self._epoch += 1
+    def next_sequence(self):
+        with self._lock:
+            self._sequence += 1
+            return self._sequence
+    def read_token(self):
+        with self._lock:
+            return self._epoch, self._sequence
+    def get(self, id_account):
+        with self._lock:
+            self._check_coherence()
+            entry = self._entries.get(id_account)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(id_account)
+            self.hits += 1
+            return entry
+    def put(self, id_account, id_user, amount, acc_type, sequence=None, epoch=None):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            if epoch is not None and epoch != self._epoch:
+                return
+            entry = self._entries.get(id_account)
+            sequence = self._sequence if sequence is None else sequence
+            if entry is not None and entry.sequence > sequence:
+                return
+            self._entries[id_account] = CachedAccount(id_account, id_user, amount, acc_type, sequence)
+            self._entries.move_to_end(id_account)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    def update_amount(self, id_account, amount, sequence):
+        with self._lock:
+            self._epoch += 1
+            entry = self._entries.get(id_account)
+            if entry is not None and sequence >= entry.sequence:
+                entry.amount = amount
+                entry.sequence = sequence
+    def invalidate(self, id_account):
+        with self._lock:
+            self._entries.pop(id_account, None)
+            self._epoch += 1
+    def invalidate_user(self, id_user):
+        with self._lock:
+            for id_account in [key for key, entry in self._entries.items() if entry.id_user == id_user]:
+                del self._entries[id_account]
+            self._epoch += 1
+    def clear(self):
+        with self._lock:
+            self._clear()
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._entries), "max_size": self.max_size, "hits": self.hits, "misses": self.misses, "coherence": self.coherence}
@@ -1,6 +1,12 @@
+from flask import current_app, has_app_context
 from flask_login import UserMixin
 import sqlite3
+import time
 import werkzeug.security
+from decimal import Decimal, ROUND_HALF_UP
+from .cache import CachedAccount
+from .engine import Engine
+from . import audit
 
 class DatabaseConnectionError(Exception):
     pass
@@ -9,58 +15,149 @@ class ItemNotFoundError(Exception):
 class DuplicateItemError(Exception):
     pass
 DATABASE_FILE = "lite.db"
-_CURRENT_DB_PATH = DATABASE_FILE
+IDEMPOTENCY_TTL = 24 * 60 * 60
+WARM_UP_ACCOUNTS = 1000
+SCHEMA_VERSION = 5
+AUTO_VACUUM_INCREMENTAL = 2
+MONEY_SCALE = 100
+MAX_CENTS = 10 ** 15
+ACCOUNT_TABLE = "CREATE TABLE IF NOT EXISTS {name} (id_account INTEGER PRIMARY KEY, id_user TEXT, amount INTEGER, type TEXT, FOREIGN KEY (id_user) REFERENCES user (id_user) ON DELETE CASCADE)"
+STANDING_ORDER_TABLE = "CREATE TABLE IF NOT EXISTS standing_orders (id_order INTEGER PRIMARY KEY, id_user TEXT NOT NULL, id_account_from INTEGER NOT NULL, id_account_to INTEGER NOT NULL, amount INTEGER NOT NULL, interval_seconds INTEGER NOT NULL, next_run_at REAL NOT NULL, active INTEGER NOT NULL DEFAULT 1, runs INTEGER NOT NULL DEFAULT 0, failures INTEGER NOT NULL DEFAULT 0, last_run_at REAL, last_error TEXT, FOREIGN KEY (id_account_from) REFERENCES account (id_account) ON DELETE CASCADE, FOREIGN KEY (id_user) REFERENCES user (id_user) ON DELETE CASCADE)"
+TRANSACTIONS_TABLE = "CREATE TABLE IF NOT EXISTS {name} (id_transaction INTEGER PRIMARY KEY, id_account INTEGER, amount INTEGER, type TEXT, id_user TEXT, id_transfer INTEGER, FOREIGN KEY (id_account) REFERENCES account (id_account) ON DELETE CASCADE)"
+engine = Engine(DATABASE_FILE)
 
+class BankCursor(sqlite3.Cursor):
+    def __init__(self, conn):
+        super().__init__(conn)
+        self.on_commit = []
+        self.engine = None
+def current_engine():
+    if has_app_context():
+        return current_app.extensions.get("bank_engine", engine)
+    return engine
 class DatabaseManager:
-    _active_conn = None
-    def __init__(self, database_file):
-        self.database_file = database_file
+    def __init__(self, engine=None):
+        self.engine = engine
         self.conn = None
         self.cursor = None
     def __enter__(self):
+        self.engine = self.engine or current_engine()
         try:
-            if self.database_file == ':memory:' and DatabaseManager._active_conn:
-                self.conn = DatabaseManager._active_conn
-            else:
-                self.conn = sqlite3.connect(self.database_file)
-                if self.database_file == ':memory:':
-                    DatabaseManager._active_conn = self.conn
+            self.conn = self.engine.acquire()
             self.conn.execute("PRAGMA foreign_keys = ON;")
             self.conn.row_factory = sqlite3.Row 
-            self.cursor = self.conn.cursor()
+            self.cursor = self.conn.cursor(BankCursor)
+            self.cursor.engine = self.engine
+            self._changes = self.conn.total_changes
             return self.cursor
         except sqlite3.OperationalError as e:
+            if self.conn is not None:
+                self.engine.release(self.conn, False)
             raise DatabaseConnectionError(f"Error al conectar con la base de datos: {e}")
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if self.database_file != ':memory:':
-            if exc_type is None:
-                self.conn.commit()
-            else:
-                self.conn.rollback()
-            if self.conn:
-                self.conn.close()
-        else:
+        try:
             if exc_type is None:
+                change_counter = self.engine.account_cache.before_commit() if self.conn.total_changes != self._changes else None
                 self.conn.commit()
+                self.engine.account_cache.after_commit(change_counter)
             else:
                 self.conn.rollback()
+        except sqlite3.Error:
+            self.conn.rollback()
+            self.engine.release(self.conn, False)
+            raise
+        self.engine.release(self.conn, exc_type is None)
+        if exc_type is None:
+            for callback in self.cursor.on_commit:
+                callback()
+def ensure_schema(engine=None):
+    with DatabaseManager(engine) as cur:
+        cur.execute("PRAGMA user_version")
+        version = cur.fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return version, False
+    initialize_db(engine)
+    return SCHEMA_VERSION, True
+def warm_up(engine=None, limit=WARM_UP_ACCOUNTS):
+    ensure_schema(engine)
+    with DatabaseManager(engine) as cur:
+        account_cache = cur.engine.account_cache
+        epoch, sequence = account_cache.read_token()
+        cur.execute("SELECT id_account, id_user, amount, type FROM account WHERE id_account IN (SELECT id_account FROM transactions ORDER BY id_transaction DESC LIMIT ?)", (min(limit, account_cache.max_size),))
+        accounts = cur.fetchall()
+    for account_data in accounts:
+        account_cache.put(*account_data, sequence=sequence, epoch=epoch)
+    return len(accounts)
+def create_engine(database_url=DATABASE_FILE, **options):
+    return Engine(database_url, **options)
 def connect_db(db_path):
-    global _CURRENT_DB_PATH
-    _CURRENT_DB_PATH = db_path
+    current_engine().open(db_path)
     return True
 def close_connection():
-    global _CURRENT_DB_PATH
-    if DatabaseManager._active_conn:
-        DatabaseManager._active_conn.close()
-        DatabaseManager._active_conn = None
-    _CURRENT_DB_PATH = DATABASE_FILE
+    current_engine().open(DATABASE_FILE)
     return True
-def initialize_db():
+def to_cents(amount):
+    value = Decimal(str(amount))
+    if not value.is_finite():
+        raise ValueError("Error: El monto debe ser un numero finito.")
+    cents = int((value * MONEY_SCALE).to_integral_value(ROUND_HALF_UP))
+    if abs(cents) > MAX_CENTS:
+        raise ValueError(f"Error: El monto no puede superar {from_cents(MAX_CENTS)}.")
+    return cents
+def from_cents(cents):
+    return cents / MONEY_SCALE
+def _column_type(cur, table_name, column_name):
+    cur.execute(f"PRAGMA table_info({table_name})")
+    for row in cur.fetchall():
+        if row[1] == column_name:
+            return row[2].upper()
+    return None
+def _ensure_column(cur, table_name, column_name, definition):
+    if _column_type(cur, table_name, column_name) is None:
+        cur.execute(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {definition}")
+def _migrate_money_to_cents(cur):
+    cur.execute("PRAGMA foreign_keys = OFF")
+    cur.execute("BEGIN IMMEDIATE")
+    _ensure_column(cur, "transactions", "id_transfer", "INTEGER")
+    cur.execute(ACCOUNT_TABLE.format(name="account_cents"))
+    cur.execute(f"INSERT INTO account_cents (id_account, id_user, amount, type) SELECT id_account, id_user, CAST(ROUND(amount * {MONEY_SCALE}) AS INTEGER), type FROM account")
+    cur.execute(TRANSACTIONS_TABLE.format(name="transactions_cents"))
+    cur.execute(f"INSERT INTO transactions_cents (id_transaction, id_account, amount, type, id_user, id_transfer) SELECT id_transaction, id_account, CAST(ROUND(amount * {MONEY_SCALE}) AS INTEGER), type, id_user, id_transfer FROM transactions")
+    cur.execute("DROP TABLE transactions")
+    cur.execute("DROP TABLE account")
+    cur.execute("ALTER TABLE account_cents RENAME TO account")
+    cur.execute("ALTER TABLE transactions_cents RENAME TO transactions")
+def _enable_incremental_vacuum(cur):
+    cur.execute("PRAGMA auto_vacuum")
+    if cur.fetchone()[0] == AUTO_VACUUM_INCREMENTAL:
+        return False
+    cur.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    cur.execute("SELECT COUNT(*) FROM sqlite_master")
+    if cur.fetchone()[0]:
+        cur.execute("VACUUM")
+    return True
+def initialize_db(engine=None):
     try:
-        with DatabaseManager(_CURRENT_DB_PATH) as cur:            
+        with DatabaseManager(engine) as cur:            
+            _enable_incremental_vacuum(cur)
             cur.execute("CREATE TABLE IF NOT EXISTS user (id_user TEXT PRIMARY KEY, name TEXT, password_hash TEXT, role TEXT DEFAULT 'cliente')")
-            cur.execute("CREATE TABLE IF NOT EXISTS account (id_account INTEGER PRIMARY KEY, id_user TEXT, amount REAL, type TEXT, FOREIGN KEY (id_user) REFERENCES user (id_user) ON DELETE CASCADE)")
-            cur.execute("CREATE TABLE IF NOT EXISTS transactions (id_transaction INTEGER PRIMARY KEY, id_account INTEGER, amount REAL, type TEXT, id_user TEXT, FOREIGN KEY (id_account) REFERENCES account (id_account) ON DELETE CASCADE)")
+            if _column_type(cur, "account", "amount") == "REAL":
+                _migrate_money_to_cents(cur)
+                cur.on_commit.append(cur.engine.account_cache.clear)
+            cur.execute(ACCOUNT_TABLE.format(name="account"))
+            cur.execute(TRANSACTIONS_TABLE.format(name="transactions"))
+            _ensure_column(cur, "transactions", "id_transfer", "INTEGER")
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_transactions_transfer ON transactions (id_transfer) WHERE id_transfer IS NOT NULL")
+            cur.execute("CREATE TABLE IF NOT EXISTS idempotency_keys (id_user TEXT NOT NULL, idempotency_key TEXT NOT NULL, result TEXT, created_at REAL NOT NULL, fingerprint TEXT, PRIMARY KEY (id_user, idempotency_key)) WITHOUT ROWID")
+            _ensure_column(cur, "idempotency_keys", "fingerprint", "TEXT")
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_idempotency_keys_created ON idempotency_keys (created_at)")
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_account_type ON account (type)")
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_account_user ON account (id_user, id_account)")
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_transactions_user ON transactions (id_user, id_transaction)")
+            cur.execute("CREATE TABLE IF NOT EXISTS interest_runs (type TEXT NOT NULL, period TEXT NOT NULL, rate REAL NOT NULL, accounts INTEGER DEFAULT 0, created_at REAL NOT NULL, PRIMARY KEY (type, period)) WITHOUT ROWID")
+            cur.execute(STANDING_ORDER_TABLE)
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_standing_orders_due ON standing_orders (next_run_at) WHERE active = 1")
+            cur.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
             return True, "Tablas creadas con exito"
     except sqlite3.OperationalError as e:
             raise DatabaseConnectionError(f"Error al crear las tablas: {e}")
@@ -68,7 +165,7 @@ def initialize_db():
             raise Exception(f"Error inesperado en la base de datos: {e}")    
 def register_user(id_user, name, password):
     try:
-        with DatabaseManager(_CURRENT_DB_PATH) as cur:
+        with DatabaseManager() as cur:
             cur.execute("SELECT id_user FROM user WHERE id_user = ?", (id_user,))
             existing_user = cur.fetchone()
             if existing_user:
@@ -81,15 +178,45 @@ def register_user(id_user, name, password):
             raise DuplicateItemError(f"El usuario con ID '{id_user}' ya existe.")
     except sqlite3.Error as e:        
         raise Exception(f"Error en la base de datos al registrar usuario: {e}")    
+TABLE_COLUMNS = {
+    "user": "*",
+    "account": f"id_account, id_user, amount * 1.0 / {MONEY_SCALE} AS amount, type",
+    "transactions": f"id_transaction, id_account, amount * 1.0 / {MONEY_SCALE} AS amount, type, id_user, id_transfer",
+    "standing_orders": f"id_order, id_user, id_account_from, id_account_to, amount * 1.0 / {MONEY_SCALE} AS amount, interval_seconds, datetime(next_run_at, 'unixepoch') AS next_run_at, active, runs, failures, last_error",
+}
+PRIMARY_KEYS = {"user": "id_user", "account": "id_account", "transactions": "id_transaction", "standing_orders": "id_order"}
+def get_page(table_name, id_user=None, after=None, limit=100):
+    if table_name not in PRIMARY_KEYS:
+        raise ValueError(f"Tabla '{table_name}' no permitida")
+    primary_key = PRIMARY_KEYS[table_name]
+    columns = "id_user, name, role" if table_name == "user" else TABLE_COLUMNS[table_name]
+    conditions = []
+    params = []
+    if after is not None:
+        conditions.append(f"{primary_key} > ?")
+        params.append(after)
+    if id_user and table_name != "user":
+        conditions.append("id_user = ?")
+        params.append(id_user)
+    query = f"SELECT {columns} FROM {table_name}"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += f" ORDER BY {primary_key} LIMIT ?"
+    params.append(limit)
+    with DatabaseManager() as cur:
+        cur.execute(query, tuple(params))
+        rows = [dict(row) for row in cur.fetchall()]
+        next_after = rows[-1][primary_key] if len(rows) == limit else None
+        return rows, next_after
 def get_table_data(table_name, id_user=None):
     try:
-        with DatabaseManager(_CURRENT_DB_PATH) as cur: 
-            valid_tables = ["user", "account", "transactions"]
+        with DatabaseManager() as cur: 
+            valid_tables = ["user", "account", "transactions", "standing_orders"]
             if table_name not in valid_tables:            
                 raise ValueError(f"Tabla '{table_name}' no permitida")
-            query = f"SELECT * FROM {table_name}"
+            query = f"SELECT {TABLE_COLUMNS[table_name]} FROM {table_name}"
             params = []
-            if id_user and table_name in ["account", "transactions"]:
+            if id_user and table_name in ["account", "transactions", "standing_orders"]:
                 query += f" WHERE id_user = ?"
                 params.append(id_user)
             cur.execute(query, tuple(params))        
@@ -105,8 +232,8 @@ def get_table_data(table_name, id_user=None):
         return None, None, f"Error en la base de datos: {e}"
 def get_user_transactions(id_user):
     try:
-        with DatabaseManager(_CURRENT_DB_PATH) as cur: 
-            cur.execute("SELECT t.* FROM transactions t INNER JOIN account a ON t.id_account = a.id_account WHERE a.id_user = ?", (id_user,))
+        with DatabaseManager() as cur: 
+            cur.execute(f"SELECT t.id_transaction, t.id_account, t.amount * 1.0 / {MONEY_SCALE} AS amount, t.type, t.id_user, t.id_transfer FROM transactions t INNER JOIN account a ON t.id_account = a.id_account WHERE a.id_user = ?", (id_user,))
             rows = cur.fetchall()
             column_names = [description[0] for description in cur.description]
             data_list = [dict(row) for row in rows]
@@ -115,18 +242,20 @@ def get_user_transactions(id_user):
         return None, None, f"Error en la base de datos: {e}"
 def delete_user(id_user):
     try:
-        with DatabaseManager(_CURRENT_DB_PATH) as cur: 
+        with DatabaseManager() as cur: 
             cur.execute("SELECT id_user FROM user WHERE id_user = ?", (id_user,))
             existing_user = cur.fetchone()
             if not existing_user:
                 raise ItemNotFoundError(f"El usuario con id {id_user} no existe.")
             cur.execute("DELETE FROM user WHERE id_user = ?", (id_user,))            
+            cache = cur.engine.account_cache
+            cur.on_commit.append(lambda: cache.invalidate_user(id_user))
             return True, f"Usuario {id_user} eliminado con exito"
     except sqlite3.Error as e:
         raise Exception(f"Error en la base de datos al eliminar usuario: {e}")
 def update_user(id_user, new_name):
     try:
-        with DatabaseManager(_CURRENT_DB_PATH) as cur: 
+        with DatabaseManager() as cur: 
             cur.execute("UPDATE user SET name = ? WHERE id_user = ?", (new_name, id_user))
             if not cur.rowcount > 0:
                 raise ItemNotFoundError(f"Usuario con cedula {id_user} no encontrado") 
@@ -135,28 +264,41 @@ def update_user(id_user, new_name):
         raise Exception(f"Error en la base de datos: {e}")
 def insert_account(id_user, amount, acc_type):
     try:
-        with DatabaseManager(_CURRENT_DB_PATH) as cur: 
+        with DatabaseManager() as cur: 
             cur.execute("SELECT id_user FROM user WHERE id_user = ?", (id_user,))
             existing_user = cur.fetchone()
             if not existing_user:
                 raise ItemNotFoundError(f"Error: El usuario con ID '{id_user}' no existe:")
-            cur.execute("INSERT INTO account (id_user, amount, type) VALUES(?, ?, ?)", (id_user, amount, acc_type))
+            cents = to_cents(amount)
+            cur.execute("INSERT INTO account (id_user, amount, type) VALUES(?, ?, ?)", (id_user, cents, acc_type))
+            id_account = cur.lastrowid
+            cache = cur.engine.account_cache
+            sequence = cache.next_sequence()
+            cur.on_commit.append(lambda: cache.put(id_account, id_user, cents, acc_type, sequence))
             return True, f"Se inserto la cuenta para el usuario '{id_user}' correctamente."
     except sqlite3.Error as e:
         raise Exception(f"Error en la base de datos al insertar la cuenta.")
-def update_account(id_account, new_amount):
+def update_account(id_account, new_amount, actor=None):
     try:
-        with DatabaseManager(_CURRENT_DB_PATH) as cur: 
-            cur.execute("UPDATE account SET amount = ? WHERE id_account = ?", (new_amount, id_account))
-            if not cur.rowcount > 0:
+        with DatabaseManager() as cur: 
+            cents = to_cents(new_amount)
+            cur.execute("SELECT amount FROM account WHERE id_account = ?", (id_account,))
+            previous = cur.fetchone()
+            if not previous:
                 raise ItemNotFoundError(f"Numero de cuenta {id_account} no encontrado")
+            cur.execute("UPDATE account SET amount = ? WHERE id_account = ?", (cents, id_account))
+            _cache_balance(cur, id_account, cents)
+            _audit(cur, audit.OP_UPDATE_ACCOUNT, id_account, 0, cents, previous[0], actor)
             return True, f"Se actualizo la cuenta numero {id_account}"
     except sqlite3.Error as e:
             raise Exception(f"Error en la base de datos: {e}")
 def delete_account(id_account, id_user, user_role):
     try:
-        with DatabaseManager(_CURRENT_DB_PATH) as cur:
+        with DatabaseManager() as cur:
             if user_role != "admin":
+                cached = cur.engine.account_cache.get(id_account)
+                if cached and cached.id_user != id_user:
+                    raise ItemNotFoundError(f"La cuenta '{id_account}' no existe o no te pertenece")
                 cur.execute("SELECT id_account FROM account WHERE id_account = ? AND id_user = ?", (id_account, id_user))
                 existing_account = cur.fetchone()
                 if not existing_account:
@@ -164,35 +306,192 @@ def delete_account(id_account, id_user, user_role):
             cur.execute("DELETE FROM account WHERE id_account = ?", (id_account,))
             if cur.rowcount == 0:
                 raise ItemNotFoundError(f"La cuenta '{id_account}' no existe o no te pertenece")
+            cache = cur.engine.account_cache
+            cur.on_commit.append(lambda: cache.invalidate(id_account))
             return True, f"La cuenta '{id_account}' fue eliminada con exito."
     except sqlite3.Error as e:
         raise Exception(f"Error en la base de datos: {e}")
-def insert_transaction(account_id, amount, type_transaction, id_user):
+def _cache_balance(cur, id_account, cents):
+    cache = cur.engine.account_cache
+    sequence = cache.next_sequence()
+    cur.on_commit.append(lambda: cache.update_amount(id_account, cents, sequence))
+def _audit(cur, op, ref_a, ref_b, amount, extra, id_user, type_name=None):
+    journal = cur.engine.journal
+    if journal is not None:
+        def record():
+            try:
+                journal.append(op, ref_a, ref_b, amount, extra, id_user, type_name)
+            except Exception as e:
+                journal.failures += 1
+                print(f"Error al escribir en el diario de auditoria (operacion {audit.OP_NAMES.get(op, op)} ya confirmada): {e}")
+        cur.on_commit.append(record)
+def _apply_transaction(cur, account_id, cents, type_transaction, id_user):
+    if cents <= 0:
+        raise ValueError("Error: El monto de la transaccion debe ser mayor que cero.")
+    cached = cur.engine.account_cache.get(account_id)
+    if cached and cached.id_user != id_user:
+        raise ItemNotFoundError(f"Error: La cuenta especificada {account_id} no existe o no te pertenece.")
+    if type_transaction == "deposito":
+        cur.execute("UPDATE account SET amount = amount + ? WHERE id_account = ? AND id_user = ? RETURNING amount", (cents, account_id, id_user))
+    elif type_transaction == "retiro":
+        cur.execute("UPDATE account SET amount = amount - ? WHERE id_account = ? AND id_user = ? AND amount >= ? RETURNING amount", (cents, account_id, id_user, cents))
+    else:
+        raise ValueError("Error: Tipo de transacción no válido. Solo se permiten 'deposito' o 'retiro'.")
+    updated = cur.fetchone()
+    if not updated:
+        cur.execute("SELECT 1 FROM account WHERE id_account = ? AND id_user = ?", (account_id, id_user))
+        if not cur.fetchone():
+            raise ItemNotFoundError(f"Error: La cuenta especificada {account_id} no existe o no te pertenece.")
+        raise ValueError("Error: Saldo insuficiente para realizar el retiro.") 
+    cur.execute("INSERT INTO transactions (id_account, amount, type, id_user) VALUES (?, ?, ?, ?)", (account_id, cents, type_transaction, id_user))
+    _cache_balance(cur, account_id, updated[0])
+    _audit(cur, audit.OP_INSERT_TRANSACTION, cur.lastrowid, account_id, cents, updated[0], id_user, type_transaction)
+    return updated[0]
+def insert_transaction(account_id, amount, type_transaction, id_user, idempotency_key=None):
     try:
-        with DatabaseManager(_CURRENT_DB_PATH) as cur: 
-            cur.execute("SELECT amount FROM account WHERE id_account = ? AND id_user = ?", (account_id, id_user))
-            account_data = cur.fetchone()
-            if not account_data:
-                raise ItemNotFoundError(f"Error: La cuenta especificada {account_id} no existe o no te pertenece.")
-            current_balance = account_data[0]
-            new_balance = 0
-            if type_transaction == "deposito":
-                new_balance = current_balance + amount
-            elif type_transaction == "retiro":
-                if current_balance < amount:
-                    raise ValueError("Error: Saldo insuficiente para realizar el retiro.") 
-                new_balance = current_balance - amount
-            else:
-                raise ValueError("Error: Tipo de transacción no válido. Solo se permiten 'deposito' o 'retiro'.")
-            cur.execute("UPDATE account SET amount = ? WHERE id_account = ? AND id_user = ?", (new_balance, account_id, id_user))
-            cur.execute("INSERT INTO transactions (id_account, amount, type, id_user) VALUES (?, ?, ?, ?)", (account_id, amount, type_transaction, id_user))
-            return True, f"Transacción de {type_transaction} completada con éxito. Nuevo saldo: {new_balance}"
+        with DatabaseManager() as cur: 
+            cents = to_cents(amount)
+            fingerprint = f"{account_id}:{cents}:{type_transaction}"
+            if idempotency_key:
+                cur.execute("BEGIN IMMEDIATE")
+                cur.execute("SELECT result, fingerprint FROM idempotency_keys WHERE id_user = ? AND idempotency_key = ? AND created_at >= ?", (id_user, idempotency_key, time.time() - IDEMPOTENCY_TTL))
+                previous = cur.fetchone()
+                if previous:
+                    if previous["fingerprint"] not in (None, fingerprint):
+                        raise ValueError("Error: La clave de idempotencia ya se uso para una operacion distinta.")
+                    return True, previous["result"]
+            new_balance = _apply_transaction(cur, account_id, cents, type_transaction, id_user)
+            message = f"Transacción de {type_transaction} completada con éxito. Nuevo saldo: {from_cents(new_balance)}"
+            if idempotency_key:
+                cur.execute("INSERT OR REPLACE INTO idempotency_keys (id_user, idempotency_key, result, created_at, fingerprint) VALUES (?, ?, ?, ?, ?)", (id_user, idempotency_key, message, time.time(), fingerprint))
+            return True, message
     except sqlite3.Error as e:
         raise Exception(f"Error en la base de datos al insertar la transacción: {e}")
-def update_transaction(id_transaction, new_amount = None, new_type = None):
+def _apply_transfer(cur, id_account_from, id_account_to, cents, id_user):
+    if id_account_from == id_account_to:
+        raise ValueError("Error: La cuenta de origen y la de destino deben ser distintas.")
+    if cents <= 0:
+        raise ValueError("Error: El monto de la transferencia debe ser mayor que cero.")
+    cur.execute("SELECT id_account, id_user, amount FROM account WHERE id_account IN (?, ?)", (id_account_from, id_account_to))
+    accounts = {row["id_account"]: row for row in cur.fetchall()}
+    source = accounts.get(id_account_from)
+    if not source or source["id_user"] != id_user:
+        raise ItemNotFoundError(f"Error: La cuenta especificada {id_account_from} no existe o no te pertenece.")
+    destination = accounts.get(id_account_to)
+    if not destination:
+        raise ItemNotFoundError(f"Error: La cuenta de destino {id_account_to} no existe.")
+    if source["amount"] < cents:
+        raise ValueError("Error: Saldo insuficiente para realizar la transferencia.")
+    for id_account, delta in sorted([(id_account_from, -cents), (id_account_to, cents)]):
+        cur.execute("UPDATE account SET amount = amount + ? WHERE id_account = ? RETURNING amount", (delta, id_account))
+        _cache_balance(cur, id_account, cur.fetchone()[0])
+    cur.execute("INSERT INTO transactions (id_account, amount, type, id_user) VALUES (?, ?, ?, ?)", (id_account_from, cents, "retiro", id_user))
+    id_transfer = cur.lastrowid
+    cur.execute("UPDATE transactions SET id_transfer = ? WHERE id_transaction = ?", (id_transfer, id_transfer))
+    cur.execute("INSERT INTO transactions (id_account, amount, type, id_user, id_transfer) VALUES (?, ?, ?, ?, ?)", (id_account_to, cents, "deposito", destination["id_user"], id_transfer))
+    _audit(cur, audit.OP_TRANSFER, id_account_from, id_account_to, cents, id_transfer, id_user)
+    return id_transfer
+def transfer(id_account_from, id_account_to, amount, id_user):
+    cents = to_cents(amount)
+    try:
+        with DatabaseManager() as cur:
+            cur.execute("BEGIN IMMEDIATE")
+            id_transfer = _apply_transfer(cur, id_account_from, id_account_to, cents, id_user)
+            return True, f"Transferencia {id_transfer} de {amount} a la cuenta {id_account_to} completada con éxito."
+    except sqlite3.Error as e:
+        raise Exception(f"Error en la base de datos al realizar la transferencia: {e}")
+def apply_operations_batch(operations, id_user):
+    results = []
+    try:
+        with DatabaseManager() as cur:
+            cur.execute("BEGIN IMMEDIATE")
+            for index, operation in enumerate(operations):
+                try:
+                    cents = to_cents(operation["amount"])
+                    if operation.get("type") == "transferencia":
+                        id_transfer = _apply_transfer(cur, operation["id_account_from"], operation["id_account_to"], cents, id_user)
+                        results.append({"id_transfer": id_transfer})
+                    else:
+                        new_balance = _apply_transaction(cur, operation["id_account"], cents, operation.get("type"), id_user)
+                        results.append({"id_transaction": cur.lastrowid, "balance": from_cents(new_balance)})
+                except (ValueError, ItemNotFoundError) as e:
+                    e.operation_index = index
+                    raise
+            return results
+    except sqlite3.Error as e:
+        raise Exception(f"Error en la base de datos al aplicar el lote de operaciones: {e}")
+def register_users_batch(users):
+    id_users = [user["id_user"] for user in users]
+    if len(set(id_users)) != len(id_users):
+        raise DuplicateItemError("Error: El lote contiene usuarios repetidos.")
     try:
-        with DatabaseManager(_CURRENT_DB_PATH) as cur: 
-            cur.execute("SELECT id_transaction FROM transactions WHERE id_transaction = ?", (id_transaction,))
+        with DatabaseManager() as cur:
+            cur.execute("BEGIN IMMEDIATE")
+            cur.execute(f"SELECT id_user FROM user WHERE id_user IN ({', '.join('?' * len(id_users))})", id_users)
+            existing = sorted(row[0] for row in cur.fetchall())
+            if existing:
+                raise DuplicateItemError(f"Error: Los usuarios {', '.join(existing)} ya existen.")
+            cur.executemany("INSERT INTO user (id_user, name, password_hash, role) VALUES (?, ?, ?, ?)", [(user["id_user"], user["name"], werkzeug.security.generate_password_hash(user["password"]), "cliente") for user in users])
+            return len(users)
+    except sqlite3.Error as e:
+        raise Exception(f"Error en la base de datos al registrar los usuarios: {e}")
+def insert_accounts_batch(accounts):
+    try:
+        with DatabaseManager() as cur:
+            cur.execute("BEGIN IMMEDIATE")
+            id_users = sorted({account["id_user"] for account in accounts})
+            cur.execute(f"SELECT id_user FROM user WHERE id_user IN ({', '.join('?' * len(id_users))})", id_users)
+            missing = set(id_users) - {row[0] for row in cur.fetchall()}
+            if missing:
+                raise ItemNotFoundError(f"Error: Los usuarios {', '.join(sorted(missing))} no existen.")
+            cur.executemany("INSERT INTO account (id_user, amount, type) VALUES (?, ?, ?)", [(account["id_user"], to_cents(account["amount"]), account["type"]) for account in accounts])
+            return len(accounts)
+    except sqlite3.Error as e:
+        raise Exception(f"Error en la base de datos al insertar las cuentas: {e}")
+def create_standing_order(id_user, id_account_from, id_account_to, amount, interval_seconds, first_run_at=None):
+    cents = to_cents(amount)
+    if id_account_from == id_account_to:
+        raise ValueError("Error: La cuenta de origen y la de destino deben ser distintas.")
+    if cents <= 0:
+        raise ValueError("Error: El monto de la orden debe ser mayor que cero.")
+    if interval_seconds <= 0:
+        raise ValueError("Error: La periodicidad de la orden debe ser mayor que cero.")
+    try:
+        with DatabaseManager() as cur:
+            cur.execute("SELECT id_account FROM account WHERE id_account = ? AND id_user = ?", (id_account_from, id_user))
+            if not cur.fetchone():
+                raise ItemNotFoundError(f"Error: La cuenta especificada {id_account_from} no existe o no te pertenece.")
+            cur.execute("SELECT id_account FROM account WHERE id_account = ?", (id_account_to,))
+            if not cur.fetchone():
+                raise ItemNotFoundError(f"Error: La cuenta de destino {id_account_to} no existe.")
+            next_run_at = first_run_at if first_run_at is not None else time.time()
+            cur.execute("INSERT INTO standing_orders (id_user, id_account_from, id_account_to, amount, interval_seconds, next_run_at) VALUES (?, ?, ?, ?, ?, ?)", (id_user, id_account_from, id_account_to, cents, interval_seconds, next_run_at))
+            return True, f"Orden permanente {cur.lastrowid} creada con éxito."
+    except sqlite3.Error as e:
+        raise Exception(f"Error en la base de datos al crear la orden permanente: {e}")
+def cancel_standing_order(id_order, id_user, user_role):
+    try:
+        with DatabaseManager() as cur:
+            if user_role == "admin":
+                cur.execute("UPDATE standing_orders SET active = 0 WHERE id_order = ? AND active = 1", (id_order,))
+            else:
+                cur.execute("UPDATE standing_orders SET active = 0 WHERE id_order = ? AND id_user = ? AND active = 1", (id_order, id_user))
+            if cur.rowcount == 0:
+                raise ItemNotFoundError(f"La orden permanente '{id_order}' no existe o no te pertenece.")
+            return True, f"La orden permanente {id_order} fue cancelada."
+    except sqlite3.Error as e:
+        raise Exception(f"Error en la base de datos al cancelar la orden permanente: {e}")
+def sweep_idempotency_keys(max_age=IDEMPOTENCY_TTL, engine=None):
+    try:
+        with DatabaseManager(engine) as cur:
+            cur.execute("DELETE FROM idempotency_keys WHERE created_at < ?", (time.time() - max_age,))
+            return cur.rowcount
+    except sqlite3.Error as e:
+        raise Exception(f"Error en la base de datos al limpiar las claves de idempotencia: {e}")
+def update_transaction(id_transaction, new_amount = None, new_type = None, actor=None):
+    try:
+        with DatabaseManager() as cur: 
+            cur.execute("SELECT id_transaction, amount, type FROM transactions WHERE id_transaction = ?", (id_transaction,))
             existing_transaction = cur.fetchone()
             if not existing_transaction:
                 raise ItemNotFoundError(f"La transacción con ID '{id_transaction}' no existe.")
@@ -200,7 +499,7 @@ def update_transaction(id_transaction, new_amount = None, new_type = None):
             params = []        
             if new_amount is not None:
                 updates.append("amount = ?")
-                params.append(new_amount)
+                params.append(to_cents(new_amount))
             if new_type is not None:
                 updates.append("type = ?")
                 params.append(new_type)              
@@ -209,37 +508,42 @@ def update_transaction(id_transaction, new_amount = None, new_type = None):
             query = f"UPDATE transactions SET {', '.join(updates)} WHERE id_transaction = ?"
             params.append(id_transaction)
             cur.execute(query, tuple(params))            
+            new_cents = to_cents(new_amount) if new_amount is not None else existing_transaction["amount"]
+            _audit(cur, audit.OP_UPDATE_TRANSACTION, id_transaction, 0, new_cents, existing_transaction["amount"], actor, new_type or existing_transaction["type"])
             return True, f"Transaccion {id_transaction} actualizada con exito"
     except sqlite3.Error as e:
         raise Exception(f"Error en la base de datos al actualizar la transacción: {e}")
-def delete_transaction(id_transaction):
+def delete_transaction(id_transaction, actor=None):
     try:
-        with DatabaseManager(_CURRENT_DB_PATH) as cur: 
-            cur.execute("SELECT id_account, amount, type FROM transactions WHERE id_transaction = ?", (id_transaction,)) 
+        with DatabaseManager() as cur: 
+            cur.execute("SELECT id_transaction, id_account, amount, type, id_transfer FROM transactions WHERE id_transaction = ?", (id_transaction,)) 
             transaction_data = cur.fetchone()
             if not transaction_data:
                 raise ItemNotFoundError(f"La transaccion con ID '{id_transaction}' no existe.")      
-            id_account, amount, transaction_type = transaction_data
-            cur.execute("SELECT amount FROM account WHERE id_account = ?", (id_account,))
-            account_balance_data = cur.fetchone()
-            if not account_balance_data:
-                raise ItemNotFoundError(f"La cuenta con ID '{id_account}' asociada a la transacion no existe.")
-            account_balance = account_balance_data[0]
-            new_balance = 0
-            if transaction_type == "deposito":
-                new_balance = account_balance - amount
-            elif transaction_type == "retiro":
-                new_balance = account_balance + amount
-            else:
-                raise ValueError("Tipo de transacción no válido para reversión.")
-            cur.execute("UPDATE account SET amount = ? WHERE id_account = ?", (new_balance, id_account))
-            cur.execute("DELETE FROM transactions WHERE id_transaction = ?", (id_transaction,))
+            legs = [transaction_data]
+            if transaction_data["id_transfer"] is not None:
+                cur.execute("SELECT id_transaction, id_account, amount, type, id_transfer FROM transactions WHERE id_transfer = ? ORDER BY id_account", (transaction_data["id_transfer"],))
+                legs = cur.fetchall()
+            for leg_id, id_account, amount, transaction_type, _ in legs:
+                if transaction_type in ("deposito", "interes"):
+                    delta = -amount
+                elif transaction_type == "retiro":
+                    delta = amount
+                else:
+                    raise ValueError("Tipo de transacción no válido para reversión.")
+                cur.execute("UPDATE account SET amount = amount + ? WHERE id_account = ? RETURNING amount", (delta, id_account))
+                updated = cur.fetchone()
+                if not updated:
+                    raise ItemNotFoundError(f"La cuenta con ID '{id_account}' asociada a la transacion no existe.")
+                _cache_balance(cur, id_account, updated[0])
+                _audit(cur, audit.OP_DELETE_TRANSACTION, leg_id, id_account, amount, updated[0], actor, transaction_type)
+                cur.execute("DELETE FROM transactions WHERE id_transaction = ?", (leg_id,))
             return True, f"La transacción {id_transaction} fue eliminada con éxito."
     except sqlite3.Error as e:
             raise Exception(f"Error en la base de datos: {e}")
 def update_user_profile(id_user, new_name = None, new_password = None):
     try:
-        with DatabaseManager(_CURRENT_DB_PATH) as cur: 
+        with DatabaseManager() as cur: 
             updates = []
             params = []
             if new_name:
@@ -268,23 +572,44 @@ class User(UserMixin):
     def check_password(self, password):
         return werkzeug.security.check_password_hash(self.password_hash, password)
 def get_user(id_user):
-    with DatabaseManager(_CURRENT_DB_PATH) as cur: 
+    with DatabaseManager() as cur: 
         cur.execute("SELECT id_user, name, password_hash, role FROM user WHERE id_user = ?", (id_user,))
         user_data = cur.fetchone()
         if user_data:
             return User(*user_data)
         return None
 def get_all_users():
-    with DatabaseManager(_CURRENT_DB_PATH) as cur:
+    with DatabaseManager() as cur:
         cur.execute("SELECT * FROM user")
         rows = cur.fetchall()
         return [User(*dict(row).values()) for row in rows]
 def get_account(id_account):
-    with DatabaseManager(_CURRENT_DB_PATH) as cur:
-        cur.execute("SELECT id_account, id_user, amount,type FROM account WHERE id_account = ?", (id_account,))
-        account_data = cur.fetchone()
-        if account_data:
-            return type('Account', (object,), {'id': account_data[0], 'user_id': account_data[1], 'balance': account_data[2], 'type': account_data[3]})
-        return None
+    account_cache = current_engine().account_cache
+    cached = account_cache.get(id_account)
+    if cached is None:
+        epoch, sequence = account_cache.read_token()
+        with DatabaseManager() as cur:
+            cur.execute("SELECT id_account, id_user, amount,type FROM account WHERE id_account = ?", (id_account,))
+            account_data = cur.fetchone()
+        if not account_data:
+            return None
+        cached = CachedAccount(*account_data)
+        account_cache.put(*account_data, sequence=sequence, epoch=epoch)
+    return type('Account', (object,), {'id': cached.id_account, 'user_id': cached.id_user, 'balance': from_cents(cached.amount), 'type': cached.type})
+def get_balance_summary(id_user=None):
+    with DatabaseManager() as cur:
+        query = "SELECT COUNT(*), COALESCE(SUM(amount), 0) FROM account"
+        params = ()
+        if id_user:
+            query += " WHERE id_user = ?"
+            params = (id_user,)
+        cur.execute(query, params)
+        accounts, total = cur.fetchone()
+        query = "SELECT COALESCE(SUM(CASE WHEN type IN ('deposito', 'interes') THEN amount ELSE 0 END), 0), COALESCE(SUM(CASE WHEN type = 'retiro' THEN amount ELSE 0 END), 0) FROM transactions"
+        if id_user:
+            query += " WHERE id_user = ?"
+        cur.execute(query, params)
+        credits, debits = cur.fetchone()
+        return {"accounts": accounts, "total": from_cents(total), "credits": from_cents(credits), "debits": from_cents(debits)}
 def update_user_name(id_user, new_name):
     return update_user(id_user, new_name)            
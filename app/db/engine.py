@@ -0,0 +1,96 @@
+import os
+import sqlite3
+import threading
+from .cache import AccountCache, ACCOUNT_CACHE_SIZE
+
+POOL_SIZE = 8
+URL_PREFIX = "sqlite:///"
+
+def database_path(database_url):
+    if database_url.startswith(URL_PREFIX):
+        return database_url[len(URL_PREFIX):] or ':memory:'
+    return database_url
+
+class Engine:
+    def __init__(self, database_file, pool_size=POOL_SIZE, cache_size=ACCOUNT_CACHE_SIZE, coherence="shared"):
+        self.database_file = None
+        self.pool_size = pool_size
+        self.account_cache = AccountCache(cache_size, coherence)
+        self.journal = None
+        self.memory_conn = None
+        self._bound = False
+        self._idle = []
+        self._lock = threading.Lock()
+        self._memory_lock = threading.RLock()
+        self._pid = os.getpid()
+        self._counters = {"opened": 0, "reused": 0, "commits": 0, "rollbacks": 0}
+        self.open(database_file)
+    def open(self, database_file):
+        self.close()
+        self.database_file = database_path(database_file)
+        with self._lock:
+            self._bind_cache()
+    def _bind_cache(self):
+        self.account_cache.bind(self.database_file)
+        self._bound = True
+    def adopt(self, conn):
+        with self._lock:
+            self._check_process()
+        with self._memory_lock, self._lock:
+            if self.database_file != ':memory:':
+                raise ValueError("Solo un motor en memoria puede adoptar una conexion.")
+            if self.memory_conn is not None and self.memory_conn is not conn:
+                self.memory_conn.close()
+            self.memory_conn = conn
+    def _check_process(self):
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._idle = []
+            self.memory_conn = None
+            self._memory_lock = threading.RLock()
+    def acquire(self):
+        with self._lock:
+            self._check_process()
+            if not self._bound:
+                self._bind_cache()
+            memory = self.database_file == ':memory:'
+        if memory:
+            self._memory_lock.acquire()
+            with self._lock:
+                if self.memory_conn is None:
+                    self.memory_conn = sqlite3.connect(':memory:', check_same_thread=False)
+                    self._counters["opened"] += 1
+                else:
+                    self._counters["reused"] += 1
+                return self.memory_conn
+        with self._lock:
+            if self._idle:
+                self._counters["reused"] += 1
+                return self._idle.pop()
+            self._counters["opened"] += 1
+        return sqlite3.connect(self.database_file, check_same_thread=False)
+    def release(self, conn, committed):
+        with self._lock:
+            self._counters["commits" if committed else "rollbacks"] += 1
+            if conn is self.memory_conn:
+                self._memory_lock.release()
+                return
+            if len(self._idle) < self.pool_size and self._pid == os.getpid():
+                self._idle.append(conn)
+                return
+        conn.close()
+    def close(self):
+        with self._lock:
+            self._check_process()
+        with self._memory_lock, self._lock:
+            for conn in self._idle:
+                conn.close()
+            if self.memory_conn is not None:
+                self.memory_conn.close()
+            self._idle = []
+            self.memory_conn = None
+            self.account_cache.bind(None)
+            self._bound = False
+    def stats(self):
+        with self._lock:
+            return {"database": self.database_file, "pool_idle": len(self._idle), "pool_size": self.pool_size, **self._counters, "audit_failures": self.journal.failures if self.journal else 0, "cache": self.account_cache.stats()}
@@ -0,0 +1,28 @@
+import math
+import sqlite3
+import time
+from . import database
+
+MAX_INTEREST_RATE = 1
+
+def accrue_interest(acc_type, rate, period):
+    if not acc_type or not period:
+        raise ValueError("Error: El tipo de cuenta y el periodo son obligatorios.")
+    if not math.isfinite(rate) or rate <= 0:
+        raise ValueError("Error: La tasa de interes debe ser un numero finito mayor que cero.")
+    if rate > MAX_INTEREST_RATE:
+        raise ValueError(f"Error: La tasa de interes no puede superar el {MAX_INTEREST_RATE:.0%} por periodo.")
+    try:
+        with database.DatabaseManager() as cur:
+            cur.execute("BEGIN IMMEDIATE")
+            cur.execute("INSERT OR IGNORE INTO interest_runs (type, period, rate, created_at) VALUES (?, ?, ?, ?)", (acc_type, period, rate, time.time()))
+            if cur.rowcount == 0:
+                return False, f"El interes del periodo '{period}' para las cuentas '{acc_type}' ya fue aplicado."
+            cur.execute("INSERT INTO transactions (id_account, amount, type, id_user) SELECT id_account, CAST(ROUND(amount * ?) AS INTEGER), 'interes', id_user FROM account WHERE type = ? AND ROUND(amount * ?) > 0", (rate, acc_type, rate))
+            accounts = cur.rowcount
+            cur.execute("UPDATE account SET amount = amount + CAST(ROUND(amount * ?) AS INTEGER) WHERE type = ? AND ROUND(amount * ?) > 0", (rate, acc_type, rate))
+            cur.execute("UPDATE interest_runs SET accounts = ? WHERE type = ? AND period = ?", (accounts, acc_type, period))
+            cur.on_commit.append(cur.engine.account_cache.clear)
+            return True, f"Interes del periodo '{period}' aplicado a {accounts} cuentas '{acc_type}'."
+    except sqlite3.Error as e:
+        raise Exception(f"Error en la base de datos al aplicar intereses: {e}")
@@ -0,0 +1,141 @@
+import fcntl
+import os
+import sqlite3
+import threading
+import time
+from . import database
+
+MAINTENANCE_INTERVAL = 60 * 60
+QUIET_SECONDS = 5
+VACUUM_STEP_PAGES = 128
+VACUUM_MAX_STEPS = 64
+VACUUM_STEP_SLEEP = 0.01
+ANALYSIS_LIMIT = 1000
+
+def database_report(engine=None):
+    with database.DatabaseManager(engine) as cur:
+        report = {}
+        for pragma in ("page_size", "page_count", "freelist_count", "auto_vacuum"):
+            cur.execute(f"PRAGMA {pragma}")
+            report[pragma] = cur.fetchone()[0]
+        database_file = cur.engine.database_file
+    if database_file != ':memory:' and os.path.exists(database_file):
+        report["file_size"] = os.path.getsize(database_file)
+    else:
+        report["file_size"] = report["page_count"] * report["page_size"]
+    return report
+def optimize(engine=None, analysis_limit=ANALYSIS_LIMIT):
+    started = time.perf_counter()
+    with database.DatabaseManager(engine) as cur:
+        cur.execute(f"PRAGMA analysis_limit = {int(analysis_limit)}")
+        cur.execute("ANALYZE")
+        cur.execute("SELECT COUNT(DISTINCT tbl) FROM sqlite_stat1")
+        analyzed = cur.fetchone()[0]
+    return analyzed, time.perf_counter() - started
+def incremental_vacuum(engine=None, pages=VACUUM_STEP_PAGES, max_steps=VACUUM_MAX_STEPS, sleep=VACUUM_STEP_SLEEP):
+    started = time.perf_counter()
+    freed = 0
+    for _ in range(max_steps):
+        with database.DatabaseManager(engine) as cur:
+            cur.execute("PRAGMA freelist_count")
+            free_pages = cur.fetchone()[0]
+            if free_pages == 0:
+                break
+            cur.execute(f"PRAGMA incremental_vacuum({int(pages)})")
+            cur.fetchall()
+            cur.execute("PRAGMA freelist_count")
+            freed += free_pages - cur.fetchone()[0]
+        if sleep:
+            time.sleep(sleep)
+    return freed, time.perf_counter() - started
+def run_maintenance(engine=None, pages=VACUUM_STEP_PAGES, max_steps=VACUUM_MAX_STEPS, sleep=VACUUM_STEP_SLEEP):
+    try:
+        before = database_report(engine)
+        expired_keys = database.sweep_idempotency_keys(engine=engine)
+        analyzed, optimize_seconds = optimize(engine)
+        freed, vacuum_seconds = incremental_vacuum(engine, pages, max_steps, sleep)
+        after = database_report(engine)
+    except sqlite3.Error as e:
+        raise Exception(f"Error en la base de datos durante el mantenimiento: {e}")
+    return {
+        "file_size_before": before["file_size"],
+        "file_size": after["file_size"],
+        "freelist_before": before["freelist_count"],
+        "freelist_count": after["freelist_count"],
+        "pages_freed": freed,
+        "expired_idempotency_keys": expired_keys,
+        "incremental": after["auto_vacuum"] == database.AUTO_VACUUM_INCREMENTAL,
+        "analyzed_tables": analyzed,
+        "optimize_seconds": optimize_seconds,
+        "vacuum_seconds": vacuum_seconds,
+    }
+def _activity(engine, probe=None):
+    if probe is not None:
+        return probe.execute("PRAGMA data_version").fetchone()[0]
+    stats = engine.stats()
+    return stats["commits"] + stats["rollbacks"]
+
+class MaintenanceScheduler(threading.Thread):
+    def __init__(self, interval=MAINTENANCE_INTERVAL, quiet_seconds=QUIET_SECONDS, engine=None):
+        super().__init__(name="maintenance", daemon=True)
+        self.interval = interval
+        self.quiet_seconds = quiet_seconds
+        self.engine = engine or database.current_engine()
+        self.last_report = None
+        self._probe = None
+        self._probe_file = None
+        self._stop_event = threading.Event()
+    def _open_probe(self):
+        database_file = self.engine.database_file
+        if self._probe is not None and self._probe_file != database_file:
+            self.close_probe()
+        if database_file == ':memory:':
+            return None
+        if self._probe is None:
+            self._probe = sqlite3.connect(database_file, check_same_thread=False)
+            self._probe_file = database_file
+        return self._probe
+    def close_probe(self):
+        if self._probe is not None:
+            self._probe.close()
+            self._probe = None
+    def wait_for_quiet(self):
+        probe = self._open_probe()
+        while True:
+            activity = _activity(self.engine, probe)
+            if self._stop_event.wait(self.quiet_seconds):
+                return False
+            if _activity(self.engine, probe) == activity:
+                return True
+    def run_once(self):
+        database_file = self.engine.database_file
+        lock_fd = None
+        if database_file != ':memory:':
+            lock_fd = os.open(f"{database_file}.maintenance", os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(lock_fd)
+                return None
+        try:
+            self.last_report = run_maintenance(self.engine)
+            return self.last_report
+        finally:
+            if lock_fd is not None:
+                os.close(lock_fd)
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                if self.wait_for_quiet():
+                    report = self.run_once()
+                    if report:
+                        print(f"Mantenimiento de '{self.engine.database_file}': {report['pages_freed']} paginas liberadas, {report['file_size']} bytes, {report['freelist_count']} paginas libres, {report['expired_idempotency_keys']} claves de idempotencia caducadas, ANALYZE {report['optimize_seconds']:.3f}s, vacuum {report['vacuum_seconds']:.3f}s.")
+            except Exception as e:
+                print(f"Error en el planificador de mantenimiento: {e}")
+        self.close_probe()
+    def stop(self):
+        self._stop_event.set()
+def start_maintenance(interval=MAINTENANCE_INTERVAL, quiet_seconds=QUIET_SECONDS, engine=None):
+    scheduler = MaintenanceScheduler(interval, quiet_seconds, engine)
+    scheduler.start()
+    return scheduler
@@ -0,0 +1,55 @@
+import sqlite3
+import threading
+import time
+from . import database
+
+STANDING_ORDER_BATCH = 500
+SCHEDULER_INTERVAL = 60
+
+def _next_run_at(next_run_at, interval_seconds, now):
+    missed = int((now - next_run_at) // interval_seconds) + 1
+    return next_run_at + missed * interval_seconds
+def run_due_standing_orders(now=None, batch_size=STANDING_ORDER_BATCH, engine=None):
+    now = now if now is not None else time.time()
+    executed = 0
+    failed = 0
+    try:
+        while True:
+            with database.DatabaseManager(engine) as cur:
+                cur.execute("BEGIN IMMEDIATE")
+                cur.execute("SELECT id_order, id_user, id_account_from, id_account_to, amount, interval_seconds, next_run_at FROM standing_orders WHERE active = 1 AND next_run_at <= ? ORDER BY next_run_at LIMIT ?", (now, batch_size))
+                orders = cur.fetchall()
+                for order in orders:
+                    next_run_at = _next_run_at(order["next_run_at"], order["interval_seconds"], now)
+                    try:
+                        database._apply_transfer(cur, order["id_account_from"], order["id_account_to"], order["amount"], order["id_user"])
+                    except (ValueError, database.ItemNotFoundError) as e:
+                        cur.execute("UPDATE standing_orders SET next_run_at = ?, failures = failures + 1, last_run_at = ?, last_error = ? WHERE id_order = ?", (next_run_at, now, str(e), order["id_order"]))
+                        failed += 1
+                        continue
+                    cur.execute("UPDATE standing_orders SET next_run_at = ?, runs = runs + 1, last_run_at = ?, last_error = NULL WHERE id_order = ?", (next_run_at, now, order["id_order"]))
+                    executed += 1
+            if len(orders) < batch_size:
+                return executed, failed
+    except sqlite3.Error as e:
+        raise Exception(f"Error en la base de datos al ejecutar las ordenes permanentes: {e}")
+
+class StandingOrderScheduler(threading.Thread):
+    def __init__(self, interval=SCHEDULER_INTERVAL, batch_size=STANDING_ORDER_BATCH, engine=None):
+        super().__init__(name="standing-orders", daemon=True)
+        self.interval = interval
+        self.batch_size = batch_size
+        self.engine = engine or database.current_engine()
+        self._stop_event = threading.Event()
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                run_due_standing_orders(batch_size=self.batch_size, engine=self.engine)
+            except Exception as e:
+                print(f"Error en el planificador de ordenes permanentes: {e}")
+    def stop(self):
+        self._stop_event.set()
+def start_scheduler(interval=SCHEDULER_INTERVAL, batch_size=STANDING_ORDER_BATCH, engine=None):
+    scheduler = StandingOrderScheduler(interval, batch_size, engine)
+    scheduler.start()
+    return scheduler
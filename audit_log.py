@@ -0,0 +1,6 @@
+# audit_log.py
+import sys
+from app.db import audit
+
+if __name__ == '__main__':
+    sys.exit(audit.main())
@@ -0,0 +1,24 @@
+# backup_db.py
+import argparse
+from app.db import database
+from app.db import backup
+
+def run_backup(args):
+    database.connect_db(args.database)
+    if args.restore:
+        success, message = backup.restore_backup(args.restore, args.database)
+        print(f"Éxito: {message}")
+        return success
+    snapshot_path = backup.backup_db(args.dir, args.keep, args.pages, args.sleep)
+    print(f"Copia de seguridad creada y verificada: {snapshot_path}")
+    return True
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Copia de seguridad en caliente de la base de datos.")
+    parser.add_argument("--database", default=database.DATABASE_FILE)
+    parser.add_argument("--dir", default=backup.BACKUP_DIR)
+    parser.add_argument("--keep", type=int, default=backup.BACKUP_KEEP)
+    parser.add_argument("--pages", type=int, default=backup.BACKUP_PAGES)
+    parser.add_argument("--sleep", type=float, default=backup.BACKUP_SLEEP)
+    parser.add_argument("--restore", metavar="SNAPSHOT", help="Restaura la copia indicada en --database. La aplicacion debe estar detenida.")
+    run_backup(parser.parse_args())
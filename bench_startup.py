@@ -0,0 +1,51 @@
+# bench_startup.py
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+from app.db import database
+database.connect_db(sys.argv[1])
+from app import create_app
+app = create_app({"SECRET_KEY": "bench", "JINJA_CACHE_DIR": sys.argv[2]}) if sys.argv[3] == "boot" else create_app({"SECRET_KEY": "bench", "TESTING": True})
+booted = time.perf_counter()
+response = app.test_client().get("/login")
+assert response.status_code == 200
+first_request = time.perf_counter()
+print(json.dumps({"boot": booted - started, "first_request": first_request - booted, "total": first_request - started}))
+"""
+
+def run_probe(db_path, cache_dir, mode):
+    output = subprocess.check_output([sys.executable, "-c", PROBE, db_path, cache_dir, mode], cwd=os.path.dirname(os.path.abspath(__file__)))
+    return json.loads(output)
+
+def measure(label, runs, db_path, cache_dir, mode, clear_cache=False):
+    samples = []
+    for _ in range(runs):
+        if clear_cache:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+        samples.append(run_probe(db_path, cache_dir, mode))
+    row = {key: statistics.median(sample[key] for sample in samples) * 1000 for key in samples[0]}
+    print(f"{label:<32} {row['boot']:>10.1f} {row['first_request']:>14.1f} {row['total']:>10.1f}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Mide el tiempo de arranque de la aplicacion.")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    work_dir = tempfile.mkdtemp()
+    db_path = os.path.join(work_dir, "bench.db")
+    cache_dir = os.path.join(work_dir, "jinja_cache")
+    try:
+        print(f"{'modo (mediana en ms)':<32} {'arranque':>10} {'1a peticion':>14} {'total':>10}")
+        measure("sin precompilar", args.runs, db_path, cache_dir, "lazy")
+        measure("precompilado, cache vacia", args.runs, db_path, cache_dir, "boot", clear_cache=True)
+        measure("precompilado, cache persistente", args.runs, db_path, cache_dir, "boot")
+    finally:
+        shutil.rmtree(work_dir)
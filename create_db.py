@@ -1,15 +1,15 @@
 # create_db.py
 import sqlite3
 # Asegúrate de importar tu función de creación de tablas
-from app.db.database import create_table
+from app.db.database import ensure_schema, SCHEMA_VERSION
 
 def run_create_table():
-    # Llama a la función principal que crea las tablas
-    success, message = create_table()
-    if success:
-        print(f"Éxito: {message}")
+    # Crea las tablas o migra el esquema solo si la version guardada es anterior
+    version, migrated = ensure_schema()
+    if migrated:
+        print(f"Éxito: Esquema creado o migrado a la version {version}")
     else:
-        print(f"Fallo: {message}")
+        print(f"El esquema ya esta en la version {version} (actual: {SCHEMA_VERSION})")
 
 if __name__ == '__main__':
     run_create_table()
\ No newline at end of file
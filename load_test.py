@@ -0,0 +1,103 @@
+# load_test.py
+import argparse
+import http.client
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from app.db import database
+
+LOAD_USER = "LOAD_1"
+LOAD_PASSWORD = "load-test"
+
+def wait_for_server(port, timeout=15):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+def seed_database(db_path):
+    database.connect_db(db_path)
+    database.ensure_schema()
+    database.register_user(LOAD_USER, "Carga", LOAD_PASSWORD)
+    database.insert_accounts_batch([{"id_user": LOAD_USER, "amount": 100, "type": "ahorros"}] * 100)
+    database.close_connection()
+
+def login(port):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    try:
+        conn.request("POST", "/login", body=f"id_usuario={LOAD_USER}&password={LOAD_PASSWORD}", headers={"Content-Type": "application/x-www-form-urlencoded"})
+        response = conn.getresponse()
+        response.read()
+        return response.getheader("Set-Cookie", "").split(";")[0]
+    finally:
+        conn.close()
+
+def client(port, path, duration, results):
+    count = 0
+    errors = 0
+    cookie = login(port)
+    deadline = time.time() + duration
+    while time.time() < deadline:
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+        try:
+            conn.request("GET", path, headers={"Cookie": cookie})
+            response = conn.getresponse()
+            response.read()
+            if response.status == 200:
+                count += 1
+            else:
+                errors += 1
+        except OSError:
+            errors += 1
+        finally:
+            conn.close()
+    results.put((count, errors))
+
+def measure(workers, port, path, duration, clients, db_path):
+    env = dict(os.environ, SECRET_KEY="load-test")
+    server = subprocess.Popen(
+        [sys.executable, "serve.py", "--bind", f"127.0.0.1:{port}", "--workers", str(workers), "--database", db_path],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        if not wait_for_server(port):
+            raise RuntimeError("El servidor no arranco a tiempo.")
+        results = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=client, args=(port, path, duration, results)) for _ in range(clients)]
+        for process in processes:
+            process.start()
+        totals = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        requests = sum(count for count, _ in totals)
+        errors = sum(errors for _, errors in totals)
+        return requests / duration, errors
+    finally:
+        server.terminate()
+        server.wait()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Mide peticiones por segundo segun el numero de workers.")
+    parser.add_argument("--path", default="/api/accounts?limit=100", help="Ruta autenticada que consulta la base de datos.")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--max-workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    db_path = os.path.join(tempfile.mkdtemp(), "load_test.db")
+    seed_database(db_path)
+    workers = 1
+    baseline = None
+    print(f"{'workers':>8} {'req/s':>10} {'escala':>8} {'errores':>8}")
+    while workers <= args.max_workers:
+        rps, errors = measure(workers, args.port, args.path, args.duration, workers * 2, db_path)
+        baseline = baseline or rps
+        print(f"{workers:>8} {rps:>10.1f} {rps / baseline:>7.2f}x {errors:>8}")
+        workers *= 2
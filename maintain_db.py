@@ -0,0 +1,22 @@
+# maintain_db.py
+import argparse
+from app.db import database
+from app.db import maintenance
+
+def run_maintenance(args):
+    database.connect_db(args.database)
+    database.ensure_schema()
+    report = maintenance.run_maintenance(pages=args.pages, max_steps=args.steps, sleep=args.sleep)
+    print(f"Tamaño: {report['file_size_before']} -> {report['file_size']} bytes")
+    print(f"Paginas libres: {report['freelist_before']} -> {report['freelist_count']} ({report['pages_freed']} liberadas)")
+    print(f"Claves de idempotencia caducadas: {report['expired_idempotency_keys']}")
+    print(f"ANALYZE ({report['analyzed_tables']} tablas): {report['optimize_seconds']:.3f}s, incremental_vacuum: {report['vacuum_seconds']:.3f}s")
+    return report
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Mantenimiento de la base de datos sin VACUUM completo.")
+    parser.add_argument("--database", default=database.DATABASE_FILE)
+    parser.add_argument("--pages", type=int, default=maintenance.VACUUM_STEP_PAGES)
+    parser.add_argument("--steps", type=int, default=maintenance.VACUUM_MAX_STEPS)
+    parser.add_argument("--sleep", type=float, default=maintenance.VACUUM_STEP_SLEEP)
+    run_maintenance(parser.parse_args())
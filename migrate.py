@@ -1,5 +1,6 @@
 # migrate.py
 import sqlite3
+from app.db import database
 
 def connect():
     # Usa la misma función que tu aplicación para asegurar la conexión
@@ -29,5 +30,13 @@ def migrate_db():
         if conn:
             conn.close()
 
+def migrate_money_to_cents(db_path=database.DATABASE_FILE):
+    # initialize_db convierte las columnas REAL de montos a centavos enteros
+    database.connect_db(db_path)
+    success, message = database.initialize_db()
+    print(f"Esquema en la version {database.SCHEMA_VERSION}: {message}")
+    return success, message
+
 if __name__ == '__main__':
-    migrate_db()
\ No newline at end of file
+    migrate_db()
+    migrate_money_to_cents()
\ No newline at end of file
@@ -0,0 +1,62 @@
+# serve.py
+import argparse
+import multiprocessing
+import os
+import secrets
+from app.db import database
+
+def default_workers():
+    return multiprocessing.cpu_count() * 2 + 1
+
+def post_fork(server, worker):
+    engine = worker.app.wsgi().extensions["bank_engine"]
+    primed = database.warm_up(engine)
+    interval = float(os.environ.get("STANDING_ORDERS_INTERVAL", 0))
+    if interval > 0:
+        from app.db import scheduler
+        scheduler.start_scheduler(interval, engine=engine)
+    maintenance_interval = float(os.environ.get("MAINTENANCE_INTERVAL", 0))
+    if maintenance_interval > 0:
+        from app.db import maintenance
+        maintenance.start_maintenance(maintenance_interval, engine=engine)
+    server.log.info(f"Worker {worker.pid} listo sobre '{engine.database_file}' con {primed} cuentas en cache.")
+
+def build_options(bind=None, workers=None, threads=None):
+    return {
+        "bind": bind or os.environ.get("BIND", "127.0.0.1:8000"),
+        "workers": workers or int(os.environ.get("WEB_CONCURRENCY", default_workers())),
+        "threads": threads or int(os.environ.get("THREADS", 1)),
+        "preload_app": True,
+        "post_fork": post_fork,
+        "accesslog": os.environ.get("ACCESS_LOG"),
+    }
+
+def serve(app, options):
+    from gunicorn.app.base import BaseApplication
+
+    class BankApplication(BaseApplication):
+        def __init__(self, application, options):
+            self.application = application
+            self.options = options
+            super().__init__()
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+        def load(self):
+            return self.application
+
+    BankApplication(app, options).run()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Servidor de produccion con varios procesos.")
+    parser.add_argument("--bind")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--threads", type=int)
+    parser.add_argument("--database", default=database.DATABASE_FILE)
+    args = parser.parse_args()
+    if not os.environ.get("SECRET_KEY"):
+        print("Aviso: SECRET_KEY no definida, se genera una clave temporal para esta ejecucion.")
+        os.environ["SECRET_KEY"] = secrets.token_hex(32)
+    os.environ["DATABASE_URL"] = args.database
+    from app import create_app
+    serve(create_app(), build_options(args.bind, args.workers, args.threads))
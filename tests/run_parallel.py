@@ -0,0 +1,56 @@
+import argparse
+import io
+import os
+import sys
+import time
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from . import template_db
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def _iter_tests(suite):
+    for test in suite:
+        if isinstance(test, unittest.TestSuite):
+            yield from _iter_tests(test)
+        else:
+            yield test
+def collect_test_classes(pattern="test*.py"):
+    suite = unittest.defaultTestLoader.discover(TESTS_DIR, pattern=pattern, top_level_dir=os.path.dirname(TESTS_DIR))
+    classes = {}
+    for test in _iter_tests(suite):
+        class_name = test.id().rsplit(".", 1)[0]
+        classes.setdefault(class_name, []).append(test.id())
+    return list(classes.values())
+def run_chunk(test_ids):
+    stream = io.StringIO()
+    suite = unittest.defaultTestLoader.loadTestsFromNames(test_ids)
+    result = unittest.TextTestRunner(stream=stream, verbosity=0).run(suite)
+    problems = [(str(test), trace) for test, trace in result.failures + result.errors]
+    return result.testsRun, len(result.skipped), problems
+def run_parallel(workers, pattern="test*.py"):
+    template_db.build_template()
+    chunks = [[] for _ in range(workers)]
+    for test_ids in sorted(collect_test_classes(pattern), key=len, reverse=True):
+        min(chunks, key=len).extend(test_ids)
+    chunks = [chunk for chunk in chunks if chunk]
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+        results = list(executor.map(run_chunk, chunks))
+    elapsed = time.perf_counter() - started
+    total = sum(tests_run for tests_run, _, _ in results)
+    skipped = sum(skipped for _, skipped, _ in results)
+    problems = [problem for _, _, chunk_problems in results for problem in chunk_problems]
+    for test_name, trace in problems:
+        print("=" * 70)
+        print(f"FALLO: {test_name}")
+        print(trace)
+    print(f"{total} tests en {elapsed:.2f}s con {len(chunks)} procesos, {len(problems)} fallos, {skipped} omitidos.")
+    return not problems
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Ejecuta la suite de tests en varios procesos.")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count())
+    parser.add_argument("-p", "--pattern", default="test*.py")
+    args = parser.parse_args()
+    sys.exit(0 if run_parallel(args.workers, args.pattern) else 1)
@@ -0,0 +1,45 @@
+import atexit
+import os
+import shutil
+import sqlite3
+import tempfile
+from app.db import database
+
+TEMPLATE_DIR_ENV = "BANK_TEST_TEMPLATE_DIR"
+_templates = {}
+
+def _template_dir():
+    path = os.environ.get(TEMPLATE_DIR_ENV)
+    if not path or not os.path.isdir(path):
+        path = tempfile.mkdtemp(prefix="bank-tests-")
+        os.environ[TEMPLATE_DIR_ENV] = path
+        owner = os.getpid()
+        atexit.register(lambda: os.getpid() == owner and shutil.rmtree(path, ignore_errors=True))
+    return path
+def build_template(seed=None):
+    name = f"{seed.__module__}.{seed.__qualname__}" if seed else "schema"
+    name = f"{name}-v{database.SCHEMA_VERSION}"
+    if name in _templates:
+        return _templates[name]
+    path = os.path.join(_template_dir(), f"{name}.db")
+    if not os.path.exists(path):
+        partial_path = f"{path}.{os.getpid()}.part"
+        database.connect_db(partial_path)
+        database.initialize_db()
+        if seed:
+            seed()
+        database.close_connection()
+        os.replace(partial_path, path)
+    _templates[name] = path
+    return path
+def clone_template(seed=None):
+    source = sqlite3.connect(f"file:{build_template(seed)}?mode=ro", uri=True)
+    conn = sqlite3.connect(':memory:', check_same_thread=False)
+    try:
+        source.backup(conn)
+    finally:
+        source.close()
+    database.close_connection()
+    database.connect_db(':memory:')
+    database.current_engine().adopt(conn)
+    return conn
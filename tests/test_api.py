@@ -0,0 +1,135 @@
+import unittest
+import os
+import shutil
+import sqlite3
+import tempfile
+from unittest import mock
+from app import create_app
+from app.db import database
+from flask import url_for
+from .template_db import clone_template
+
+class ApiTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({
+            'TESTING': True,
+            'DATABASE_URL': ':memory:',
+            'SERVER_NAME': 'test.app',
+            'SECRET_KEY': 'clave_secreta_para_testing'
+        })
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+        clone_template()
+        database.register_user("API_1", "Api Client", "pass")
+        database.insert_account("API_1", 100.0, "ahorros")
+        database.insert_account("API_1", 0.0, "corriente")
+        accounts, _, _ = database.get_table_data("account", id_user="API_1")
+        self.source_id, self.destination_id = accounts[0]["id_account"], accounts[1]["id_account"]
+    def tearDown(self):
+        self.app_context.pop()
+        database.close_connection()
+    def login(self, user_id="API_1", password="pass"):
+        self.client.post(url_for('main.login'), data={'id_usuario': user_id, 'password': password})
+    def test_requires_authentication(self):
+        response = self.client.get("/api/accounts")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.get_json()["error"]["code"], "unauthorized")
+    def test_accounts_are_paginated_by_key(self):
+        self.login()
+        first = self.client.get("/api/accounts?limit=1").get_json()
+        self.assertEqual([row["id_account"] for row in first["data"]], [self.source_id])
+        self.assertEqual(first["data"][0]["amount"], 100.0)
+        second = self.client.get(f"/api/accounts?limit=1&after={first['next_after']}").get_json()
+        self.assertEqual([row["id_account"] for row in second["data"]], [self.destination_id])
+    def test_batch_operations_are_applied_in_one_transaction(self):
+        self.login()
+        response = self.client.post("/api/transactions/batch", json={"operations": [
+            {"type": "deposito", "id_account": self.source_id, "amount": 50},
+            {"type": "transferencia", "id_account_from": self.source_id, "id_account_to": self.destination_id, "amount": 120.5},
+            {"type": "retiro", "id_account": self.destination_id, "amount": 20.5},
+        ]})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.get_json()["results"]), 3)
+        self.assertEqual(database.get_account(self.source_id).balance, 29.5)
+        self.assertEqual(database.get_account(self.destination_id).balance, 100.0)
+    def test_failed_batch_rolls_back_and_reports_operation(self):
+        self.login()
+        response = self.client.post("/api/transactions/batch", json={"operations": [
+            {"type": "deposito", "id_account": self.source_id, "amount": 50},
+            {"type": "retiro", "id_account": 9999, "amount": 1},
+        ]})
+        self.assertEqual(response.status_code, 404)
+        error = response.get_json()["error"]
+        self.assertEqual((error["code"], error["operation_index"]), ("not_found", 1))
+        self.assertEqual(database.get_account(self.source_id).balance, 100.0, "El lote fallido no debe aplicar nada.")
+    def test_users_endpoint_is_admin_only(self):
+        self.login()
+        self.assertEqual(self.client.get("/api/users").status_code, 403)
+        database.register_user("API_ADMIN", "Admin", "pass")
+        with database.DatabaseManager() as cur:
+            cur.execute("UPDATE user SET role = 'admin' WHERE id_user = 'API_ADMIN'")
+        self.client.get(url_for('main.logout'))
+        self.login("API_ADMIN")
+        users = self.client.get("/api/users").get_json()["data"]
+        self.assertEqual([user["id_user"] for user in users], ["API_1", "API_ADMIN"])
+        self.assertNotIn("password_hash", users[0], "La API no debe exponer los hashes.")
+        response = self.client.post("/api/accounts/batch", json={"accounts": [{"id_user": "NOPE", "amount": 1, "type": "ahorros"}]})
+        self.assertEqual(response.status_code, 404)
+    def test_non_finite_and_sub_cent_amounts_are_rejected(self):
+        self.login()
+        for amount in ["inf", 1e300, "nan", 0.001]:
+            response = self.client.post("/api/transactions/batch", json={"operations": [{"type": "retiro", "id_account": self.source_id, "amount": amount}]})
+            self.assertEqual(response.status_code, 400, f"El monto {amount} debe rechazarse.")
+        with self.assertRaises(ValueError):
+            database.insert_transaction(self.source_id, 0.001, "retiro", "API_1")
+        self.assertEqual(database.get_table_data("transactions", id_user="API_1")[0], [], "No deben escribirse movimientos de cero.")
+    def test_users_batch_is_created_atomically_and_duplicates_conflict(self):
+        database.register_user("API_ADMIN", "Admin", "pass")
+        with database.DatabaseManager() as cur:
+            cur.execute("UPDATE user SET role = 'admin' WHERE id_user = 'API_ADMIN'")
+        self.login("API_ADMIN")
+        response = self.client.post("/api/users/batch", json={"users": [{"id_user": "NEW_1", "name": "Nuevo", "password": "pass"}]})
+        self.assertEqual((response.status_code, response.get_json()), (201, {"created": 1}))
+        self.assertTrue(database.get_user("NEW_1").check_password("pass"))
+        response = self.client.post("/api/users/batch", json={"users": [{"id_user": "NEW_2", "name": "Otro", "password": "pass"}, {"id_user": "API_1", "name": "Repetido", "password": "pass"}]})
+        self.assertEqual((response.status_code, response.get_json()["error"]["code"]), (409, "duplicate"))
+        self.assertIsNone(database.get_user("NEW_2"), "Un lote con duplicados no debe crear ningun usuario.")
+    def test_database_errors_are_returned_as_json(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        path = os.path.join(temp_dir, "locked.db")
+        holder = sqlite3.connect(path, isolation_level=None)
+        holder.execute("CREATE TABLE t (x)")
+        holder.execute("BEGIN EXCLUSIVE")
+        blocked = sqlite3.connect(path, timeout=0)
+        self.addCleanup(holder.close)
+        self.addCleanup(blocked.close)
+        broken = sqlite3.connect(":memory:")
+        self.addCleanup(broken.close)
+        def wrapped(conn, statement):
+            def run(*args):
+                try:
+                    conn.execute(statement)
+                except sqlite3.Error as e:
+                    raise Exception(f"Error en la base de datos: {e}")
+            return run
+        self.login()
+        operations = {"operations": [{"type": "deposito", "id_account": self.source_id, "amount": 1}]}
+        cases = [
+            (wrapped(blocked, "INSERT INTO t VALUES (1)"), 503),
+            (database.DatabaseConnectionError("Error al conectar con la base de datos"), 503),
+            (wrapped(broken, "SELECT * FROM missing"), 500),
+        ]
+        for side_effect, status in cases:
+            with mock.patch.object(database, "apply_operations_batch", side_effect=side_effect):
+                response = self.client.post("/api/transactions/batch", json=operations)
+            self.assertEqual(response.status_code, status)
+            self.assertEqual(response.get_json()["error"]["code"], "database_error")
+            self.assertEqual("Retry-After" in response.headers, status == 503)
+    def test_client_pages_use_owner_index(self):
+        with database.DatabaseManager() as cur:
+            for table_name, primary_key in [("account", "id_account"), ("transactions", "id_transaction")]:
+                cur.execute(f"EXPLAIN QUERY PLAN SELECT * FROM {table_name} WHERE {primary_key} > ? AND id_user = ? ORDER BY {primary_key} LIMIT 100", (0, "API_1"))
+                plan = " ".join(row["detail"] for row in cur.fetchall())
+                self.assertIn(f"idx_{table_name}_user", plan)
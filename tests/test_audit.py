@@ -0,0 +1,79 @@
+import unittest
+import os
+import shutil
+import tempfile
+from unittest import mock
+from app.db import audit
+from app.db import database
+from .template_db import clone_template
+
+class AuditJournalTestCase(unittest.TestCase):
+    def setUp(self):
+        clone_template()
+        self.audit_dir = tempfile.mkdtemp()
+        database.current_engine().journal = audit.AuditJournal(self.audit_dir)
+        database.register_user("AUD_1", "Auditado", "pass")
+        database.insert_account("AUD_1", 100.0, "corriente")
+        database.insert_account("AUD_1", 0.0, "ahorro")
+        accounts = database.get_table_data("account", id_user="AUD_1")[0]
+        self.account_id, self.savings_id = accounts[0]["id_account"], accounts[1]["id_account"]
+    def tearDown(self):
+        database.current_engine().journal.close()
+        database.current_engine().journal = None
+        shutil.rmtree(self.audit_dir)
+        database.close_connection()
+    def test_money_operations_are_journaled(self):
+        database.insert_transaction(self.account_id, 25.5, "deposito", "AUD_1")
+        transaction_id = database.get_user_transactions("AUD_1")[0][0]["id_transaction"]
+        database.update_transaction(transaction_id, new_amount=30, actor="ADMIN")
+        database.delete_transaction(transaction_id, actor="ADMIN")
+        database.update_account(self.account_id, 50, actor="ADMIN")
+        database.transfer(self.account_id, self.savings_id, 10, "AUD_1")
+        records = list(audit.read_records(self.audit_dir))
+        self.assertEqual([entry.op for entry in records], ["insert_transaction", "update_transaction", "delete_transaction", "update_account", "transfer"])
+        self.assertEqual([entry.seq for entry in records], [1, 2, 3, 4, 5])
+        inserted, updated, deleted, account, transfer = records
+        self.assertEqual((inserted.ref_a, inserted.ref_b, inserted.amount, inserted.extra, inserted.id_user, inserted.type), (transaction_id, self.account_id, 2550, 12550, "AUD_1", "deposito"))
+        self.assertEqual((updated.amount, updated.extra, updated.id_user), (3000, 2550, "ADMIN"))
+        self.assertEqual((account.amount, account.extra), (5000, 9550))
+        self.assertEqual((transfer.ref_a, transfer.ref_b, transfer.amount), (self.account_id, self.savings_id, 1000))
+        self.assertEqual(audit.verify_journal(self.audit_dir), (True, 5, "ok"))
+    def test_failed_operations_are_not_journaled(self):
+        with self.assertRaises(ValueError):
+            database.insert_transaction(self.account_id, 500.0, "retiro", "AUD_1")
+        self.assertEqual(list(audit.read_records(self.audit_dir)), [])
+    def test_journal_failure_does_not_fail_committed_operation(self):
+        engine = database.current_engine()
+        database.get_account(self.account_id)
+        with mock.patch.object(engine.journal, "append", side_effect=OSError("disco lleno")):
+            result, _ = database.insert_transaction(self.account_id, 5, "deposito", "AUD_1")
+        self.assertTrue(result, "La operacion confirmada debe reportarse como exitosa.")
+        self.assertEqual(engine.stats()["audit_failures"], 1)
+        self.assertEqual(engine.account_cache.get(self.account_id).amount, 10500, "Los demas callbacks deben ejecutarse.")
+    def test_tampering_breaks_the_chain(self):
+        for _ in range(3):
+            database.insert_transaction(self.account_id, 1, "deposito", "AUD_1")
+        path = audit.list_segments(self.audit_dir)[0]
+        with open(path, "r+b") as f:
+            f.seek(2 * audit.RECORD_SIZE + 32)
+            f.write((999999).to_bytes(8, "little", signed=True))
+        valid, total, message = audit.verify_journal(self.audit_dir)
+        self.assertFalse(valid)
+        self.assertEqual(total, 1)
+        self.assertIn("2", message)
+    def test_segments_roll_over_and_keep_the_chain(self):
+        journal = audit.AuditJournal(os.path.join(self.audit_dir, "small"), key=b"secreto", segment_records=4)
+        for index in range(10):
+            self.assertEqual(journal.append(audit.OP_TRANSFER, index, index + 1, 100), index + 1)
+        journal.close()
+        small_dir = os.path.join(self.audit_dir, "small")
+        self.assertEqual(len(audit.list_segments(small_dir)), 3)
+        self.assertEqual(audit.verify_journal(small_dir, b"secreto"), (True, 10, "ok"))
+        self.assertFalse(audit.verify_journal(small_dir, b"otra")[0])
+        reopened = audit.AuditJournal(small_dir, key=b"secreto", segment_records=4)
+        self.assertEqual(reopened.append(audit.OP_TRANSFER), 11)
+        reopened.close()
+        self.assertEqual(audit.verify_journal(small_dir, b"secreto"), (True, 11, "ok"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import os
+import shutil
+import sqlite3
+import tempfile
+from app.db import database
+from app.db import backup
+
+class BackupTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "banco.db")
+        self.backup_dir = os.path.join(self.temp_dir, "backups")
+        database.connect_db(self.db_path)
+        database.initialize_db()
+        database.register_user("BK_1", "Backup User", "pass")
+        database.insert_account("BK_1", 750.0, "ahorros")
+    def tearDown(self):
+        database.close_connection()
+        shutil.rmtree(self.temp_dir)
+    def test_backup_creates_verified_snapshot(self):
+        snapshot_path = backup.backup_db(self.backup_dir, pages=1, sleep=0)
+        self.assertTrue(os.path.exists(snapshot_path), "La copia debe existir en disco.")
+        self.assertTrue(os.path.basename(snapshot_path).startswith("banco-"))
+        valid, message = backup.verify_backup(snapshot_path)
+        self.assertTrue(valid, f"La copia debe pasar integrity_check: {message}")
+    def test_backup_retention_keeps_latest_snapshots(self):
+        snapshots = [backup.backup_db(self.backup_dir, keep=2) for _ in range(3)]
+        remaining = backup.list_backups(self.backup_dir)
+        self.assertEqual(remaining, snapshots[1:], "Solo deben quedar las dos copias mas recientes.")
+    def test_restore_loads_snapshot_into_fresh_database(self):
+        snapshot_path = backup.backup_db(self.backup_dir)
+        restored_path = os.path.join(self.temp_dir, "restaurada.db")
+        result, message = backup.restore_backup(snapshot_path, restored_path)
+        self.assertTrue(result, "La restauracion debe ser exitosa.")
+        database.connect_db(restored_path)
+        accounts, _, _ = database.get_table_data("account", id_user="BK_1")
+        self.assertEqual(len(accounts), 1, "La cuenta debe existir en la base restaurada.")
+        self.assertEqual(accounts[0]["amount"], 750.0)
+    def test_restore_replaces_offline_database_and_drops_stale_journal(self):
+        snapshot_path = backup.backup_db(self.backup_dir)
+        database.insert_account("BK_1", 1.0, "corriente")
+        with open(self.db_path + "-journal", "wb") as f:
+            f.write(b"journal de otra base de datos")
+        backup.restore_backup(snapshot_path)
+        self.assertFalse(os.path.exists(self.db_path + "-journal"), "El journal anterior no debe aplicarse sobre la copia.")
+        accounts, _, _ = database.get_table_data("account", id_user="BK_1")
+        self.assertEqual([account["amount"] for account in accounts], [750.0])
+    def test_restore_refuses_database_in_use(self):
+        snapshot_path = backup.backup_db(self.backup_dir)
+        other = sqlite3.connect(self.db_path, isolation_level=None)
+        try:
+            other.execute("BEGIN IMMEDIATE")
+            with self.assertRaises(backup.BackupError):
+                backup.restore_backup(snapshot_path)
+        finally:
+            other.close()
+        self.assertFalse(os.path.exists(self.db_path + ".restore"))
+        self.assertEqual(len(database.get_table_data("account", id_user="BK_1")[0]), 1)
+    def test_restore_rejects_corrupt_snapshot(self):
+        corrupt_path = os.path.join(self.temp_dir, "corrupta.db")
+        with open(corrupt_path, "wb") as f:
+            f.write(b"esto no es una base de datos" * 100)
+        with self.assertRaises(backup.BackupError):
+            backup.restore_backup(corrupt_path, os.path.join(self.temp_dir, "destino.db"))
@@ -0,0 +1,147 @@
+import unittest
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from unittest import mock
+from app.db import database
+from app.db.cache import AccountCache
+from .template_db import clone_template
+
+class AccountCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        clone_template()
+        database.register_user("CACHE_1", "Merchant", "pass")
+        database.insert_account("CACHE_1", 100.0, "corriente")
+        self.account_id = database.get_table_data("account", id_user="CACHE_1")[0][0]["id_account"]
+    def tearDown(self):
+        database.close_connection()
+        database.current_engine().account_cache.configure()
+    def test_balance_reads_are_served_from_cache(self):
+        hits = database.current_engine().account_cache.stats()["hits"]
+        for _ in range(3):
+            self.assertEqual(database.get_account(self.account_id).balance, 100.0)
+        self.assertEqual(database.current_engine().account_cache.stats()["hits"], hits + 3)
+    def test_committed_balance_changes_are_written_through(self):
+        database.insert_transaction(self.account_id, 25.5, "deposito", "CACHE_1")
+        self.assertEqual(database.current_engine().account_cache.get(self.account_id).amount, 12550)
+        database.update_account(self.account_id, 10)
+        self.assertEqual(database.get_account(self.account_id).balance, 10.0)
+    def test_failed_transaction_does_not_touch_cache(self):
+        with self.assertRaises(ValueError):
+            database.insert_transaction(self.account_id, 500.0, "retiro", "CACHE_1")
+        self.assertEqual(database.current_engine().account_cache.get(self.account_id).amount, 10000)
+    def test_ownership_check_uses_cached_owner(self):
+        database.register_user("CACHE_2", "Other", "pass")
+        with self.assertRaises(database.ItemNotFoundError):
+            database.insert_transaction(self.account_id, 1.0, "deposito", "CACHE_2")
+        with self.assertRaises(database.ItemNotFoundError):
+            database.delete_account(self.account_id, "CACHE_2", "cliente")
+    def test_deletes_invalidate_cached_accounts(self):
+        database.get_account(self.account_id)
+        database.delete_user("CACHE_1")
+        self.assertIsNone(database.current_engine().account_cache.get(self.account_id))
+        self.assertIsNone(database.get_account(self.account_id))
+    def test_commit_between_read_and_fill_is_not_cached(self):
+        cache = database.current_engine().account_cache
+        cache.invalidate(self.account_id)
+        put = cache.put
+        def racing_put(*args, **kwargs):
+            deposit = threading.Thread(target=database.insert_transaction, args=(self.account_id, 5.0, "deposito", "CACHE_1"))
+            deposit.start()
+            deposit.join()
+            return put(*args, **kwargs)
+        with mock.patch.object(cache, "put", side_effect=racing_put):
+            self.assertEqual(database.get_account(self.account_id).balance, 100.0)
+        self.assertEqual(database.get_account(self.account_id).balance, 105.0, "Un saldo leido antes de otra confirmacion no debe quedarse en la cache.")
+    def test_out_of_order_commit_callbacks_keep_newest_balance(self):
+        cache = AccountCache(coherence="local")
+        cache.put(1, "CACHE_1", 100, "ahorros")
+        first, second = cache.next_sequence(), cache.next_sequence()
+        cache.update_amount(1, 300, second)
+        cache.update_amount(1, 200, first)
+        self.assertEqual(cache.get(1).amount, 300)
+    def test_concurrent_deposits_and_reads_leave_cache_consistent(self):
+        def deposit_and_read():
+            for _ in range(100):
+                database.insert_transaction(self.account_id, 1.0, "deposito", "CACHE_1")
+                database.get_account(self.account_id)
+        threads = [threading.Thread(target=deposit_and_read) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        with database.DatabaseManager() as cur:
+            cur.execute("SELECT amount FROM account WHERE id_account = ?", (self.account_id,))
+            stored = cur.fetchone()[0]
+        self.assertEqual(stored, 50000)
+        self.assertEqual(database.current_engine().account_cache.get(self.account_id).amount, stored)
+    def test_warm_up_primes_recently_active_accounts(self):
+        database.insert_account("CACHE_1", 5.0, "corriente")
+        other_id = database.get_table_data("account", id_user="CACHE_1")[0][1]["id_account"]
+        database.insert_transaction(self.account_id, 1.0, "deposito", "CACHE_1")
+        database.insert_transaction(other_id, 1.0, "deposito", "CACHE_1")
+        cache = database.current_engine().account_cache
+        cache.clear()
+        self.assertEqual(database.warm_up(limit=1), 1, "Solo debe cargarse la cuenta con actividad mas reciente.")
+        self.assertEqual(cache.get(other_id).amount, 600)
+        self.assertIsNone(cache.get(self.account_id))
+        self.assertEqual(database.warm_up(), 2)
+        self.assertEqual(cache.get(self.account_id).amount, 10100)
+    def test_cache_is_bounded(self):
+        cache = AccountCache(max_size=2, coherence="local")
+        for id_account in range(3):
+            cache.put(id_account, "CACHE_1", 100, "ahorros")
+        self.assertIsNone(cache.get(0), "La entrada menos usada debe descartarse.")
+        self.assertEqual(cache.stats()["size"], 2)
+
+class SharedCoherenceTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "banco.db")
+        database.connect_db(self.db_path)
+        database.initialize_db()
+        database.register_user("SHARED_1", "Shared", "pass")
+        database.insert_account("SHARED_1", 100.0, "ahorros")
+    def tearDown(self):
+        database.close_connection()
+        shutil.rmtree(self.temp_dir)
+    def test_writes_from_other_processes_invalidate_cache(self):
+        self.assertEqual(database.get_account(1).balance, 100.0)
+        other = sqlite3.connect(self.db_path)
+        other.execute("UPDATE account SET amount = 5000 WHERE id_account = 1")
+        other.commit()
+        other.close()
+        self.assertEqual(database.get_account(1).balance, 50.0, "El modo compartido debe detectar escrituras externas.")
+    def test_own_commits_keep_write_through_entries(self):
+        cache = database.current_engine().account_cache
+        self.assertEqual(database.get_account(1).balance, 100.0)
+        for _ in range(3):
+            database.insert_transaction(1, 1.0, "deposito", "SHARED_1")
+            misses = cache.stats()["misses"]
+            hits = cache.stats()["hits"]
+            self.assertIsNotNone(database.get_account(1))
+            self.assertEqual((cache.stats()["misses"], cache.stats()["hits"]), (misses, hits + 1), "Las escrituras propias no deben vaciar la cache.")
+        self.assertEqual(database.get_account(1).balance, 103.0)
+    def test_external_write_between_own_commits_is_detected(self):
+        database.get_account(1)
+        database.insert_transaction(1, 1.0, "deposito", "SHARED_1")
+        other = sqlite3.connect(self.db_path)
+        other.execute("UPDATE account SET amount = 5000 WHERE id_account = 1")
+        other.commit()
+        other.close()
+        database.register_user("SHARED_2", "Other", "pass")
+        self.assertEqual(database.get_account(1).balance, 50.0)
+    def test_writes_from_other_processes_are_detected_in_wal_mode(self):
+        with database.DatabaseManager() as cur:
+            cur.execute("PRAGMA journal_mode = WAL")
+            self.assertEqual(cur.fetchone()[0], "wal")
+        self.assertEqual(database.get_account(1).balance, 100.0)
+        database.insert_transaction(1, 1.0, "deposito", "SHARED_1")
+        self.assertEqual(database.get_account(1).balance, 101.0)
+        other = sqlite3.connect(self.db_path)
+        other.execute("UPDATE account SET amount = 5000 WHERE id_account = 1")
+        other.commit()
+        other.close()
+        self.assertEqual(database.get_account(1).balance, 50.0, "El modo WAL no actualiza el contador de cambios de la cabecera.")
@@ -2,6 +2,7 @@ import unittest
 import os
 from app import create_app
 from app.db import database
+from .template_db import clone_template
 from app.db import ItemNotFoundError, DuplicateItemError
 
 class DatabaseTestCase(unittest.TestCase):
@@ -12,8 +13,7 @@ class DatabaseTestCase(unittest.TestCase):
         })
         self.app_context = self.app.app_context()
         self.app_context.push()
-        database.connect_db(':memory:')
-        database.initialize_db()
+        clone_template()
     def tearDown(self):
         self.app_context.pop()
         database.close_connection()
@@ -29,7 +29,6 @@ class DatabaseTestCase(unittest.TestCase):
         self.assertEqual(user.name, name)
         self.assertTrue(user.check_password(password), "La contraseña debe ser correcta.")
     def test_user_can_be_deleted(self):
-        database.initialize_db()
         user_id = "999"
         database.register_user(user_id, "To Delete", "hash")
         result, message = database.delete_user(user_id)
@@ -37,7 +36,6 @@ class DatabaseTestCase(unittest.TestCase):
         deleted_user = database.get_user(user_id)
         self.assertIsNone(deleted_user, "El usuario no debe ser encontrado despues de la eliminacion.")
     def test_user_name_can_be_updated(self):
-        database.initialize_db()
         user_id = "888"
         old_name = "Old Name"
         new_name = "New Name"
@@ -47,7 +45,6 @@ class DatabaseTestCase(unittest.TestCase):
         updated_user = database.get_user(user_id)
         self.assertEqual(updated_user.name, new_name, "El nombre debe ser actualizado.")
     def test_account_creation_and_retrieval(self):
-        database.initialize_db()
         user_id = "777"
         initial_amount = 500.0
         database.register_user(user_id, "Account Holder", "hash")
@@ -59,7 +56,6 @@ class DatabaseTestCase(unittest.TestCase):
         self.assertEqual(account_data["amount"], initial_amount)
         self.assertEqual(account_data["id_user"], user_id)
     def test_withdrawal_fails_on_insufficient_funds(self):
-        database.initialize_db()
         user_id = "555"
         initial_amount = 50.0
         withdrawal_amount = 100.0
@@ -73,21 +69,18 @@ class DatabaseTestCase(unittest.TestCase):
         updated_account = database.get_account(account_id)
         self.assertEqual(updated_account.balance, initial_amount, "El saldo debe permanecer inalterado.")
     def test_cannot_register_duplicate_user(self):
-        database.initialize_db()
         user_id = "444"
         database.register_user(user_id, "Original User", "pass1")        
         with self.assertRaises(DuplicateItemError) as context:
             database.register_user(user_id, "Duplicate User", "pass2")
         self.assertIn(f"El usuario con ID '{user_id}' ya existe.", str(context.exception))
     def test_cannot_delete_nonexistent_user(self):
-        database.initialize_db()
         non_existent_id = "000"
         with self.assertRaises(ItemNotFoundError) as context:
             database.delete_user(non_existent_id)
         self.assertIn(f"El usuario con id {non_existent_id} no existe.", str(context.exception))
 
     def test_deposit_transaction_updates_balance(self):
-        database.initialize_db()
         user_id = "666"
         initial_amount = 100.0
         deposit_amount = 250.0
@@ -103,7 +96,6 @@ class DatabaseTestCase(unittest.TestCase):
         transactions, _, _ = database.get_table_data("transactions", id_user=user_id)
         self.assertEqual(len(transactions), 1, "Debe haber una transacción registrada.")
     def test_cannot_delete_other_user_account(self):
-        database.initialize_db()
         user_a_id = "A_111"
         user_b_id = "B_222"
         database.register_user(user_a_id, "User A", "passA")
@@ -125,7 +117,6 @@ class DatabaseTestCase(unittest.TestCase):
             "La cuenta ajena no debe haber sido eliminada."
         ) 
     def test_transaction_can_be_updated(self):
-        database.initialize_db()
         user_id = "T_UPD_1"
         initial_amount = 500.0
         transaction_amount = 100.0
@@ -147,7 +138,6 @@ class DatabaseTestCase(unittest.TestCase):
         expected_balance_after_deposit = initial_amount + transaction_amount # 600.0
         self.assertEqual(account_after_update.balance, expected_balance_after_deposit, "La actualización de la transacción no debe afectar el saldo de la cuenta.")
     def test_transaction_deletion_reverses_balance(self):
-        database.initialize_db()
         user_id = "T_DEL_1"
         initial_amount = 200.0
         deposit_amount = 100.0        
@@ -172,7 +162,6 @@ class DatabaseTestCase(unittest.TestCase):
         transactions_after_delete, _, _ = database.get_table_data("transactions", id_user=user_id)
         self.assertEqual(len(transactions_after_delete), 0, "La transacción debe ser eliminada de la tabla.")
     def test_admin_can_delete_any_account(self):
-        database.initialize_db()
         admin_id = "ADMIN_1"
         user_id = "USER_2"
         database.register_user(admin_id, "The Admin", "admin_pass")
@@ -190,7 +179,6 @@ class DatabaseTestCase(unittest.TestCase):
         deleted_account = database.get_account(account_to_delete_id)
         self.assertIsNone(deleted_account, "La cuenta del usuario debe haber sido eliminada por el administrador.")
     def test_user_profile_can_be_updated_fully(self):
-        database.initialize_db()
         user_id = "PROFILE_1"
         old_name = "Old Name"
         old_password = "old_password"
@@ -214,7 +202,6 @@ class DatabaseTestCase(unittest.TestCase):
             "La contraseña anterior ya no debe ser válida."
         )
     def test_delete_user_deletes_accounts(self):
-        database.initialize_db()
         user_id = "CASCADE_3"
         database.register_user(user_id, "User with Accounts", "pass")
         database.insert_account(user_id, 100.0, "checking")
@@ -227,7 +214,138 @@ class DatabaseTestCase(unittest.TestCase):
         remaining_accounts, _, _ = database.get_table_data("account", id_user=user_id)
         self.assertEqual(len(remaining_accounts), 0, "Las cuentas del usuario deben eliminarse automáticamente (CASCADE).")
     def test_get_account_not_found(self):
-        database.initialize_db()
         non_existent_account_id = 9999
         account = database.get_account(non_existent_account_id)
         self.assertIsNone(account, "Buscar una cuenta inexistente debe devolver None.")
+    def test_transfer_moves_funds_and_links_ledger_rows(self):
+        user_a_id = "TRF_A"
+        user_b_id = "TRF_B"
+        database.register_user(user_a_id, "Sender", "pass")
+        database.register_user(user_b_id, "Receiver", "pass")
+        database.insert_account(user_a_id, 500.0, "ahorros")
+        database.insert_account(user_b_id, 100.0, "ahorros")
+        account_a_id = database.get_table_data("account", id_user=user_a_id)[0][0]["id_account"]
+        account_b_id = database.get_table_data("account", id_user=user_b_id)[0][0]["id_account"]
+        result, message = database.transfer(account_a_id, account_b_id, 200.0, user_a_id)
+        self.assertTrue(result, "La transferencia debe ser exitosa.")
+        self.assertEqual(database.get_account(account_a_id).balance, 300.0)
+        self.assertEqual(database.get_account(account_b_id).balance, 300.0)
+        sent, _, _ = database.get_table_data("transactions", id_user=user_a_id)
+        received, _, _ = database.get_table_data("transactions", id_user=user_b_id)
+        self.assertEqual(sent[0]["type"], "retiro")
+        self.assertEqual(received[0]["type"], "deposito")
+        self.assertEqual(sent[0]["id_transfer"], received[0]["id_transfer"], "Ambas filas deben estar enlazadas.")
+    def test_transfer_fails_on_insufficient_funds_without_side_effects(self):
+        user_id = "TRF_C"
+        database.register_user(user_id, "Short", "pass")
+        database.insert_account(user_id, 50.0, "ahorros")
+        database.insert_account(user_id, 0.0, "corriente")
+        accounts, _, _ = database.get_table_data("account", id_user=user_id)
+        source_id, destination_id = accounts[0]["id_account"], accounts[1]["id_account"]
+        with self.assertRaises(ValueError) as context:
+            database.transfer(source_id, destination_id, 80.0, user_id)
+        self.assertIn("Saldo insuficiente", str(context.exception))
+        self.assertEqual(database.get_account(source_id).balance, 50.0)
+        self.assertEqual(database.get_account(destination_id).balance, 0.0)
+        transactions, _, _ = database.get_table_data("transactions", id_user=user_id)
+        self.assertEqual(len(transactions), 0, "No debe quedar ninguna fila de la transferencia fallida.")
+    def test_cannot_transfer_from_other_user_account(self):
+        database.register_user("TRF_D", "Owner", "pass")
+        database.register_user("TRF_E", "Intruder", "pass")
+        database.insert_account("TRF_D", 500.0, "ahorros")
+        database.insert_account("TRF_E", 0.0, "ahorros")
+        account_d_id = database.get_table_data("account", id_user="TRF_D")[0][0]["id_account"]
+        account_e_id = database.get_table_data("account", id_user="TRF_E")[0][0]["id_account"]
+        with self.assertRaises(ItemNotFoundError):
+            database.transfer(account_d_id, account_e_id, 100.0, "TRF_E")
+        self.assertEqual(database.get_account(account_d_id).balance, 500.0)
+    def test_deleting_transfer_leg_reverses_both_accounts(self):
+        user_id = "TRF_F"
+        database.register_user(user_id, "Reverser", "pass")
+        database.insert_account(user_id, 400.0, "ahorros")
+        database.insert_account(user_id, 100.0, "corriente")
+        accounts, _, _ = database.get_table_data("account", id_user=user_id)
+        source_id, destination_id = accounts[0]["id_account"], accounts[1]["id_account"]
+        database.transfer(source_id, destination_id, 150.0, user_id)
+        transactions, _, _ = database.get_table_data("transactions", id_user=user_id)
+        database.delete_transaction(transactions[1]["id_transaction"])
+        self.assertEqual(database.get_account(source_id).balance, 400.0)
+        self.assertEqual(database.get_account(destination_id).balance, 100.0)
+        remaining, _, _ = database.get_table_data("transactions", id_user=user_id)
+        self.assertEqual(len(remaining), 0, "Deben eliminarse las dos filas de la transferencia.")
+    def test_retried_transaction_with_idempotency_key_is_applied_once(self):
+        user_id = "IDEM_1"
+        database.register_user(user_id, "Retrier", "pass")
+        database.insert_account(user_id, 100.0, "ahorros")
+        account_id = database.get_table_data("account", id_user=user_id)[0][0]["id_account"]
+        first = database.insert_transaction(account_id, 40.0, "deposito", user_id, idempotency_key="req-1")
+        retry = database.insert_transaction(account_id, 40.0, "deposito", user_id, idempotency_key="req-1")
+        self.assertEqual(first, retry, "El reintento debe devolver el resultado original.")
+        self.assertEqual(database.get_account(account_id).balance, 140.0, "El deposito solo debe aplicarse una vez.")
+        transactions, _, _ = database.get_table_data("transactions", id_user=user_id)
+        self.assertEqual(len(transactions), 1)
+        database.insert_transaction(account_id, 40.0, "deposito", user_id, idempotency_key="req-2")
+        self.assertEqual(database.get_account(account_id).balance, 180.0, "Una clave nueva debe aplicar la transaccion.")
+    def test_reused_idempotency_key_with_different_operation_is_rejected(self):
+        user_id = "IDEM_3"
+        database.register_user(user_id, "Reuser", "pass")
+        database.insert_account(user_id, 100.0, "ahorros")
+        account_id = database.get_table_data("account", id_user=user_id)[0][0]["id_account"]
+        database.insert_transaction(account_id, 40.0, "deposito", user_id, idempotency_key="req-1")
+        for amount, type_transaction in [(50.0, "deposito"), (40.0, "retiro")]:
+            with self.assertRaises(ValueError):
+                database.insert_transaction(account_id, amount, type_transaction, user_id, idempotency_key="req-1")
+        self.assertEqual(database.get_account(account_id).balance, 140.0, "Solo la operacion original debe aplicarse.")
+    def test_sweep_removes_expired_idempotency_keys(self):
+        user_id = "IDEM_2"
+        database.register_user(user_id, "Sweeper", "pass")
+        database.insert_account(user_id, 100.0, "ahorros")
+        account_id = database.get_table_data("account", id_user=user_id)[0][0]["id_account"]
+        database.insert_transaction(account_id, 10.0, "deposito", user_id, idempotency_key="old")
+        self.assertEqual(database.sweep_idempotency_keys(max_age=3600), 0, "Las claves recientes no deben borrarse.")
+        self.assertEqual(database.sweep_idempotency_keys(max_age=-1), 1, "Las claves expiradas deben borrarse.")
+    def test_amounts_are_stored_as_exact_integer_cents(self):
+        user_id = "CENTS_1"
+        database.register_user(user_id, "Exact", "pass")
+        database.insert_account(user_id, 0.0, "ahorros")
+        account_id = database.get_table_data("account", id_user=user_id)[0][0]["id_account"]
+        for _ in range(3):
+            database.insert_transaction(account_id, 0.1, "deposito", user_id)
+        self.assertEqual(database.get_account(account_id).balance, 0.3, "Tres depositos de 0.1 deben sumar exactamente 0.3.")
+        with database.DatabaseManager() as cur:
+            cur.execute("SELECT amount, typeof(amount) FROM account WHERE id_account = ?", (account_id,))
+            self.assertEqual(tuple(cur.fetchone()), (30, "integer"), "El saldo debe guardarse en centavos enteros.")
+    def test_balance_summary_aggregates_in_cents(self):
+        user_id = "CENTS_2"
+        database.register_user(user_id, "Summary", "pass")
+        database.insert_account(user_id, 10.10, "ahorros")
+        database.insert_account(user_id, 20.20, "corriente")
+        account_id = database.get_table_data("account", id_user=user_id)[0][0]["id_account"]
+        database.insert_transaction(account_id, 0.35, "retiro", user_id)
+        summary = database.get_balance_summary(user_id)
+        self.assertEqual(summary, {"accounts": 2, "total": 29.95, "credits": 0.0, "debits": 0.35})
+    def test_legacy_real_amounts_are_migrated_to_cents(self):
+        database.close_connection()
+        database.connect_db(':memory:')
+        with database.DatabaseManager() as cur:
+            cur.execute("CREATE TABLE user (id_user TEXT PRIMARY KEY, name TEXT, password_hash TEXT, role TEXT DEFAULT 'cliente')")
+            cur.execute("CREATE TABLE account (id_account INTEGER PRIMARY KEY, id_user TEXT, amount REAL, type TEXT, FOREIGN KEY (id_user) REFERENCES user (id_user) ON DELETE CASCADE)")
+            cur.execute("CREATE TABLE transactions (id_transaction INTEGER PRIMARY KEY, id_account INTEGER, amount REAL, type TEXT, id_user TEXT, FOREIGN KEY (id_account) REFERENCES account (id_account) ON DELETE CASCADE)")
+            cur.execute("INSERT INTO user (id_user, name) VALUES ('LEGACY', 'Legacy')")
+            cur.execute("INSERT INTO account (id_user, amount, type) VALUES ('LEGACY', 1234.56, 'ahorros')")
+            cur.execute("INSERT INTO transactions (id_account, amount, type, id_user) VALUES (1, 0.07, 'deposito', 'LEGACY')")
+        database.initialize_db()
+        with database.DatabaseManager() as cur:
+            cur.execute("SELECT amount FROM account")
+            self.assertEqual(cur.fetchone()[0], 123456)
+            cur.execute("SELECT amount FROM transactions")
+            self.assertEqual(cur.fetchone()[0], 7, "Las transacciones deben conservarse y convertirse.")
+            cur.execute("PRAGMA user_version")
+            self.assertEqual(cur.fetchone()[0], database.SCHEMA_VERSION)
+        self.assertEqual(database.get_account(1).balance, 1234.56)
+    def test_ensure_schema_only_migrates_outdated_databases(self):
+        self.assertEqual(database.ensure_schema(), (database.SCHEMA_VERSION, False), "Un esquema al dia no debe reinicializarse.")
+        database.close_connection()
+        database.connect_db(':memory:')
+        self.assertEqual(database.ensure_schema(), (database.SCHEMA_VERSION, True), "Una base vacia debe inicializarse.")
+        self.assertIsNone(database.get_account(1))
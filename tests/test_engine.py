@@ -0,0 +1,124 @@
+import unittest
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from app import create_app
+from app.db import database
+from app.db.engine import Engine, database_path
+
+class EngineTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+    def tenant_app(self, name):
+        app = create_app({'TESTING': True, 'DATABASE_URL': f"sqlite:///{os.path.join(self.temp_dir, name)}.db"})
+        with app.app_context():
+            database.initialize_db()
+        return app
+    def test_database_url_is_parsed(self):
+        self.assertEqual(database_path("sqlite:///banco.db"), "banco.db")
+        self.assertEqual(database_path("sqlite:///"), ":memory:")
+        self.assertEqual(database_path("lite.db"), "lite.db")
+    def test_each_app_resolves_its_own_engine(self):
+        tenant_a, tenant_b = self.tenant_app("a"), self.tenant_app("b")
+        self.assertIsNot(tenant_a.extensions["bank_engine"], tenant_b.extensions["bank_engine"])
+        with tenant_a.app_context():
+            database.register_user("TENANT", "Cliente A", "pass")
+            database.insert_account("TENANT", 100.0, "ahorros")
+        with tenant_b.app_context():
+            self.assertIsNone(database.get_account(1), "Los datos de un inquilino no deben verse en otro.")
+            database.register_user("TENANT", "Cliente B", "pass")
+            database.insert_account("TENANT", 5.0, "ahorros")
+        with tenant_a.app_context():
+            self.assertEqual(database.get_account(1).balance, 100.0)
+        with tenant_b.app_context():
+            self.assertEqual(database.get_account(1).balance, 5.0)
+        self.assertIsNot(tenant_a.extensions["bank_engine"].account_cache, tenant_b.extensions["bank_engine"].account_cache)
+        self.assertEqual(database.engine.database_file, database.DATABASE_FILE, "El motor por defecto no debe cambiar.")
+    def test_tenants_are_served_concurrently(self):
+        tenants = [self.tenant_app(f"t{index}") for index in range(4)]
+        for index, app in enumerate(tenants):
+            with app.app_context():
+                database.register_user("T", "Cliente", "pass")
+                database.insert_account("T", 0.0, "ahorros")
+        def deposit(app, times):
+            for _ in range(times):
+                with app.app_context():
+                    database.insert_transaction(1, 1, "deposito", "T")
+        threads = [threading.Thread(target=deposit, args=(app, 10 * (index + 1))) for index, app in enumerate(tenants)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for index, app in enumerate(tenants):
+            with app.app_context():
+                self.assertEqual(database.get_account(1).balance, 10.0 * (index + 1))
+    def test_memory_engine_serialises_concurrent_transfers(self):
+        app = create_app({'TESTING': True, 'DATABASE_URL': "sqlite:///"})
+        with app.app_context():
+            database.initialize_db()
+            database.register_user("MEM", "Cliente", "pass")
+            database.insert_account("MEM", 1000.0, "ahorros")
+            database.insert_account("MEM", 1000.0, "ahorros")
+        errors = []
+        def transfer(source, target):
+            for _ in range(200):
+                with app.app_context():
+                    try:
+                        ok, message = database.transfer(source, target, 1, "MEM")
+                    except Exception as e:
+                        errors.append(repr(e))
+                        continue
+                    if not ok:
+                        errors.append(message)
+        threads = [threading.Thread(target=transfer, args=(1 + index % 2, 2 - index % 2)) for index in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        with app.app_context():
+            balances = [database.get_account(id_account).balance for id_account in (1, 2)]
+            with database.DatabaseManager() as cur:
+                cur.execute("SELECT COUNT(*) FROM transactions")
+                rows = cur.fetchone()[0]
+        self.assertEqual(sum(balances), 2000.0, "El saldo total debe conservarse.")
+        self.assertEqual(balances, [1000.0, 1000.0])
+        self.assertEqual(rows, 4 * 200 * 2)
+        app.extensions["bank_engine"].close()
+    def test_closed_engine_keeps_shared_coherence_when_reused(self):
+        app = self.tenant_app("reopened")
+        engine = app.extensions["bank_engine"]
+        with app.app_context():
+            database.register_user("CLOSED", "Cliente", "pass")
+            database.insert_account("CLOSED", 100.0, "ahorros")
+            engine.close()
+            self.assertEqual(database.get_account(1).balance, 100.0)
+            other = sqlite3.connect(engine.database_file)
+            other.execute("UPDATE account SET amount = 5000 WHERE id_account = 1")
+            other.commit()
+            other.close()
+            self.assertEqual(database.get_account(1).balance, 50.0, "La cache debe volver a vigilar la base de datos tras cerrar el motor.")
+            database.close_connection()
+            self.assertEqual(engine.database_file, database.DATABASE_FILE)
+            self.assertEqual(engine.stats()["cache"]["size"], 0)
+    def test_pool_reuses_connections_and_counts_statistics(self):
+        engine = Engine(os.path.join(self.temp_dir, "pool.db"), pool_size=1)
+        database.initialize_db(engine)
+        for _ in range(3):
+            with database.DatabaseManager(engine) as cur:
+                cur.execute("SELECT COUNT(*) FROM user")
+        with self.assertRaises(ZeroDivisionError):
+            with database.DatabaseManager(engine) as cur:
+                1 / 0
+        stats = engine.stats()
+        self.assertEqual((stats["opened"], stats["reused"], stats["commits"], stats["rollbacks"]), (1, 4, 4, 1))
+        self.assertEqual(stats["pool_idle"], 1)
+        engine.close()
+        self.assertEqual(engine.stats()["pool_idle"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
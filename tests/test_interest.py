@@ -0,0 +1,51 @@
+import unittest
+from app import create_app
+from app.db import database
+from .template_db import clone_template
+from app.db import interest
+
+class InterestTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({
+            'TESTING': True,
+            'DATABASE_URL': ':memory:'
+        })
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        clone_template()
+        database.register_user("INT_1", "Saver", "pass")
+        database.insert_account("INT_1", 1000.0, "ahorros")
+        database.insert_account("INT_1", 333.33, "ahorros")
+        database.insert_account("INT_1", 500.0, "corriente")
+    def tearDown(self):
+        self.app_context.pop()
+        database.close_connection()
+    def balances(self):
+        accounts, _, _ = database.get_table_data("account", id_user="INT_1")
+        return [account["amount"] for account in accounts]
+    def test_interest_is_applied_to_accounts_of_type(self):
+        applied, message = interest.accrue_interest("ahorros", 0.01, "2026-10")
+        self.assertTrue(applied, "El interes debe aplicarse.")
+        self.assertEqual(self.balances(), [1010.0, 336.66, 500.0], "Solo deben cambiar las cuentas de ahorros.")
+        transactions, _, _ = database.get_table_data("transactions", id_user="INT_1")
+        self.assertEqual(sorted(t["amount"] for t in transactions), [3.33, 10.0])
+        self.assertTrue(all(t["type"] == "interes" for t in transactions))
+    def test_rerun_for_same_period_does_nothing(self):
+        interest.accrue_interest("ahorros", 0.01, "2026-10")
+        applied, message = interest.accrue_interest("ahorros", 0.01, "2026-10")
+        self.assertFalse(applied, "El mismo periodo no debe aplicarse dos veces.")
+        self.assertEqual(self.balances(), [1010.0, 336.66, 500.0])
+        transactions, _, _ = database.get_table_data("transactions", id_user="INT_1")
+        self.assertEqual(len(transactions), 2)
+    def test_non_finite_or_excessive_rates_are_rejected(self):
+        for rate in (float("inf"), float("nan"), 1e300, interest.MAX_INTEREST_RATE + 0.01, 0):
+            with self.assertRaises(ValueError):
+                interest.accrue_interest("ahorros", rate, "2026-10")
+        self.assertEqual(self.balances(), [1000.0, 333.33, 500.0])
+        applied, _ = interest.accrue_interest("ahorros", 0.01, "2026-10")
+        self.assertTrue(applied, "Un intento rechazado no debe consumir el periodo.")
+    def test_deleting_interest_transaction_reverses_balance(self):
+        interest.accrue_interest("ahorros", 0.01, "2026-10")
+        transactions, _, _ = database.get_table_data("transactions", id_user="INT_1")
+        database.delete_transaction(transactions[0]["id_transaction"])
+        self.assertEqual(self.balances()[0], 1000.0)
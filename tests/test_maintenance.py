@@ -0,0 +1,111 @@
+import unittest
+import fcntl
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from app.db import database
+from app.db import maintenance
+
+class MaintenanceTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "banco.db")
+        database.connect_db(self.db_path)
+        database.initialize_db()
+        database.register_user("MANT_1", "Cliente", "pass")
+        database.insert_accounts_batch([{"id_user": "MANT_1", "amount": 1, "type": "ahorros"}] * 5000)
+    def tearDown(self):
+        database.close_connection()
+        shutil.rmtree(self.temp_dir)
+    def test_new_databases_use_incremental_auto_vacuum(self):
+        self.assertEqual(maintenance.database_report()["auto_vacuum"], database.AUTO_VACUUM_INCREMENTAL)
+    def test_existing_databases_are_migrated_to_incremental_auto_vacuum(self):
+        legacy_path = os.path.join(self.temp_dir, "legacy.db")
+        conn = sqlite3.connect(legacy_path)
+        conn.execute("CREATE TABLE user (id_user TEXT PRIMARY KEY, name TEXT, password_hash TEXT, role TEXT DEFAULT 'cliente')")
+        conn.execute("INSERT INTO user (id_user, name) VALUES ('LEGACY', 'Legacy')")
+        conn.execute("PRAGMA user_version = 2")
+        conn.commit()
+        conn.close()
+        database.connect_db(legacy_path)
+        self.assertEqual(database.ensure_schema(), (database.SCHEMA_VERSION, True))
+        self.assertEqual(maintenance.database_report()["auto_vacuum"], database.AUTO_VACUUM_INCREMENTAL)
+        self.assertEqual(database.get_user("LEGACY").name, "Legacy")
+    def test_maintenance_reclaims_free_pages(self):
+        database.delete_user("MANT_1")
+        before = maintenance.database_report()
+        self.assertGreater(before["freelist_count"], 0, "Los borrados deben dejar paginas libres.")
+        report = maintenance.run_maintenance(pages=8, sleep=0)
+        self.assertEqual(report["freelist_before"], before["freelist_count"])
+        self.assertEqual(report["freelist_count"], 0)
+        self.assertGreater(report["pages_freed"], 0)
+        self.assertLess(report["file_size"], report["file_size_before"])
+        self.assertEqual(report["file_size"], os.path.getsize(self.db_path))
+    def account_stats(self):
+        with database.DatabaseManager() as cur:
+            cur.execute("SELECT idx, stat FROM sqlite_stat1 WHERE tbl = 'account' ORDER BY idx")
+            return [tuple(row) for row in cur.fetchall()]
+    def test_each_run_refreshes_planner_statistics(self):
+        self.assertGreater(maintenance.run_maintenance(sleep=0)["analyzed_tables"], 0)
+        before = self.account_stats()
+        self.assertTrue(before, "ANALYZE debe registrar estadisticas de la tabla account.")
+        database.register_user("MANT_2", "Cliente", "pass")
+        database.insert_accounts_batch([{"id_user": "MANT_2", "amount": 1, "type": "ahorros"}] * 20000)
+        maintenance.run_maintenance(sleep=0)
+        after = self.account_stats()
+        self.assertNotEqual(after, before, "Las estadisticas deben seguir al crecimiento de la tabla.")
+        rows = dict(after)["idx_account_user"].split()[0]
+        self.assertGreater(int(rows), 20000)
+    def test_maintenance_sweeps_expired_idempotency_keys(self):
+        database.insert_transaction(1, 1.0, "deposito", "MANT_1", idempotency_key="reciente")
+        with database.DatabaseManager() as cur:
+            cur.execute("INSERT INTO idempotency_keys (id_user, idempotency_key, result, created_at) VALUES ('MANT_1', 'caducada', 'ok', ?)", (time.time() - database.IDEMPOTENCY_TTL - 1,))
+        self.assertEqual(maintenance.run_maintenance(sleep=0)["expired_idempotency_keys"], 1)
+        with database.DatabaseManager() as cur:
+            cur.execute("SELECT idempotency_key FROM idempotency_keys")
+            self.assertEqual([row[0] for row in cur.fetchall()], ["reciente"])
+    def test_vacuum_steps_are_bounded(self):
+        database.delete_user("MANT_1")
+        free_pages = maintenance.database_report()["freelist_count"]
+        freed, _ = maintenance.incremental_vacuum(pages=2, max_steps=3, sleep=0)
+        self.assertEqual(freed, 6)
+        self.assertEqual(maintenance.database_report()["freelist_count"], free_pages - 6)
+    def test_scheduler_skips_when_another_process_is_running_maintenance(self):
+        scheduler = maintenance.MaintenanceScheduler(engine=database.current_engine())
+        lock_fd = os.open(f"{self.db_path}.maintenance", os.O_RDWR | os.O_CREAT)
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+            self.assertIsNone(scheduler.run_once())
+        finally:
+            os.close(lock_fd)
+        self.assertEqual(scheduler.run_once()["freelist_count"], 0)
+        self.assertIs(scheduler.last_report["incremental"], True)
+    def test_quiet_detection_sees_writes_from_other_processes(self):
+        engine = database.current_engine()
+        scheduler = maintenance.MaintenanceScheduler(quiet_seconds=0.2, engine=engine)
+        commits = engine.stats()["commits"]
+        stopped_writing = []
+        def write_elsewhere():
+            other = sqlite3.connect(self.db_path)
+            for index in range(10):
+                other.execute("UPDATE account SET amount = ? WHERE id_account = 1", (index,))
+                other.commit()
+                time.sleep(0.05)
+            other.close()
+            stopped_writing.append(time.monotonic())
+        writer = threading.Thread(target=write_elsewhere)
+        writer.start()
+        try:
+            self.assertTrue(scheduler.wait_for_quiet())
+            quiet_at = time.monotonic()
+        finally:
+            writer.join()
+            scheduler.close_probe()
+        self.assertGreater(quiet_at, stopped_writing[0], "Las escrituras de otro proceso deben retrasar el mantenimiento.")
+        self.assertEqual(engine.stats()["commits"], commits, "Las escrituras no pasan por el motor de este worker.")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,10 @@
 import unittest
+import os
+import shutil
+import tempfile
 from app import create_app
 from app.db import database
+from .template_db import clone_template
 from flask import url_for
 
 TEST_USER_ID = "1234"
@@ -19,8 +23,7 @@ class RoutesTestCase(unittest.TestCase):
         self.app_context = self.app.app_context()
         self.app_context.push()
         self.client = self.app.test_client()        
-        database.connect_db(':memory:')
-        database.initialize_db()
+        clone_template()
     def tearDown(self):
         self.app_context.pop()
         database.close_connection()
@@ -54,3 +57,25 @@ class RoutesTestCase(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn(b"Hola, TestUser!", response.data, "Debe mostrar el saludo del usuario logueado.")
         self.assertIn(b"Bienvenido a tu banca personal", response.data, "Debe estar en el dashboard del cliente.")
+    def test_insert_transaction_retry_with_idempotency_key(self):
+        self.register_test_user()
+        database.insert_account(TEST_USER_ID, 100.0, "ahorros")
+        account_id = database.get_table_data("account", id_user=TEST_USER_ID)[0][0]["id_account"]
+        self.login(TEST_USER_ID, TEST_PASSWORD)
+        data = {'id_account': account_id, 'amount': '25', 'type_transaction': 'deposito'}
+        for _ in range(2):
+            response = self.client.post(
+                url_for('main.insert_transaction'),
+                data=data,
+                headers={'Idempotency-Key': 'retry-abc'}
+            )
+            self.assertEqual(response.status_code, 302)
+        self.assertEqual(database.get_account(account_id).balance, 125.0, "El reintento no debe duplicar el deposito.")
+    def test_boot_precompiles_templates_into_bytecode_cache(self):
+        cache_dir = tempfile.mkdtemp()
+        try:
+            app = create_app({'SECRET_KEY': 'clave_secreta_para_testing', 'DATABASE_URL': ':memory:', 'JINJA_CACHE_DIR': cache_dir})
+            self.assertIn("login.html", [name for _, name in app.jinja_env.cache.keys()], "Las plantillas deben compilarse al arrancar.")
+            self.assertEqual(len(os.listdir(cache_dir)), len(app.jinja_env.list_templates()))
+        finally:
+            shutil.rmtree(cache_dir)
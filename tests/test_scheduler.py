@@ -0,0 +1,52 @@
+import unittest
+from app.db import database
+from app.db import scheduler
+from .template_db import clone_template
+
+DAY = 24 * 60 * 60
+
+class StandingOrderTestCase(unittest.TestCase):
+    def setUp(self):
+        clone_template()
+        database.register_user("SO_1", "Payer", "pass")
+        database.register_user("SO_2", "Landlord", "pass")
+        database.insert_account("SO_1", 1000.0, "ahorros")
+        database.insert_account("SO_2", 0.0, "corriente")
+        self.source_id = database.get_table_data("account", id_user="SO_1")[0][0]["id_account"]
+        self.destination_id = database.get_table_data("account", id_user="SO_2")[0][0]["id_account"]
+    def tearDown(self):
+        database.close_connection()
+    def orders(self):
+        with database.DatabaseManager() as cur:
+            cur.execute("SELECT * FROM standing_orders ORDER BY id_order")
+            return [dict(row) for row in cur.fetchall()]
+    def test_due_orders_are_applied_in_batches(self):
+        for _ in range(5):
+            database.create_standing_order("SO_1", self.source_id, self.destination_id, 10.0, DAY, first_run_at=1000)
+        executed, failed = scheduler.run_due_standing_orders(now=1000, batch_size=2)
+        self.assertEqual((executed, failed), (5, 0))
+        self.assertEqual(database.get_account(self.source_id).balance, 950.0)
+        self.assertEqual(database.get_account(self.destination_id).balance, 50.0)
+        self.assertTrue(all(order["next_run_at"] == 1000 + DAY for order in self.orders()))
+        self.assertEqual(scheduler.run_due_standing_orders(now=1000), (0, 0), "Las ordenes no deben repetirse antes de su fecha.")
+    def test_insufficient_funds_is_recorded_per_order(self):
+        database.create_standing_order("SO_1", self.source_id, self.destination_id, 600.0, DAY, first_run_at=1000)
+        database.create_standing_order("SO_1", self.source_id, self.destination_id, 600.0, DAY, first_run_at=1001)
+        executed, failed = scheduler.run_due_standing_orders(now=2000)
+        self.assertEqual((executed, failed), (1, 1))
+        first, second = self.orders()
+        self.assertEqual((first["runs"], first["last_error"]), (1, None))
+        self.assertEqual(second["failures"], 1)
+        self.assertIn("Saldo insuficiente", second["last_error"])
+        self.assertEqual(database.get_account(self.source_id).balance, 400.0)
+    def test_missed_periods_are_not_charged_twice(self):
+        database.create_standing_order("SO_1", self.source_id, self.destination_id, 10.0, DAY, first_run_at=0)
+        scheduler.run_due_standing_orders(now=3 * DAY + 5)
+        self.assertEqual(database.get_account(self.source_id).balance, 990.0)
+        self.assertEqual(self.orders()[0]["next_run_at"], 4 * DAY)
+    def test_cancelled_orders_are_not_run(self):
+        database.create_standing_order("SO_1", self.source_id, self.destination_id, 10.0, DAY, first_run_at=0)
+        with self.assertRaises(database.ItemNotFoundError):
+            database.cancel_standing_order(1, "SO_2", "cliente")
+        database.cancel_standing_order(1, "SO_1", "cliente")
+        self.assertEqual(scheduler.run_due_standing_orders(now=DAY), (0, 0))
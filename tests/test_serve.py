@@ -0,0 +1,38 @@
+import unittest
+import os
+import serve
+from app.db import database
+
+class ServeTestCase(unittest.TestCase):
+    def tearDown(self):
+        database.close_connection()
+    def test_build_options_reads_environment(self):
+        os.environ["WEB_CONCURRENCY"] = "3"
+        os.environ["THREADS"] = "4"
+        try:
+            options = serve.build_options(bind="127.0.0.1:9000")
+        finally:
+            del os.environ["WEB_CONCURRENCY"]
+            del os.environ["THREADS"]
+        self.assertEqual(options["bind"], "127.0.0.1:9000")
+        self.assertEqual(options["workers"], 3)
+        self.assertEqual(options["threads"], 4)
+        self.assertTrue(options["preload_app"], "La app debe cargarse antes de crear los workers.")
+    def test_forked_child_does_not_reuse_parent_connection(self):
+        database.connect_db(':memory:')
+        database.initialize_db()
+        parent_conn = database.engine.memory_conn
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            database.warm_up()
+            reused = database.engine.memory_conn is parent_conn
+            os.write(write_fd, b"1" if reused else b"0")
+            os._exit(0)
+        os.close(write_fd)
+        reused = os.read(read_fd, 1)
+        os.close(read_fd)
+        os.waitpid(pid, 0)
+        self.assertEqual(reused, b"0", "El proceso hijo debe abrir su propia conexion.")
+        self.assertIs(database.engine.memory_conn, parent_conn)
@@ -0,0 +1,35 @@
+import unittest
+from app.db import database
+from .template_db import build_template, clone_template
+
+def seed_two_accounts():
+    database.register_user("SEED_1", "Seeded User", "pass")
+    database.insert_account("SEED_1", 100.0, "ahorros")
+    database.insert_account("SEED_1", 200.0, "corriente")
+
+class OtherSeeds:
+    @staticmethod
+    def seed_two_accounts():
+        database.register_user("SEED_2", "Other Seed", "pass")
+
+class TemplateDatabaseTestCase(unittest.TestCase):
+    def tearDown(self):
+        database.close_connection()
+    def test_template_is_built_once(self):
+        self.assertEqual(build_template(), build_template(), "La plantilla debe reutilizarse entre tests.")
+    def test_clones_are_isolated(self):
+        clone_template()
+        database.register_user("CLONE_1", "First Clone", "pass")
+        clone_template()
+        self.assertIsNone(database.get_user("CLONE_1"), "Cada clon debe partir de la plantilla limpia.")
+    def test_seeded_template_contains_fixture_data(self):
+        clone_template(seed_two_accounts)
+        accounts, _, _ = database.get_table_data("account", id_user="SEED_1")
+        self.assertEqual([account["amount"] for account in accounts], [100.0, 200.0])
+    def test_templates_are_keyed_by_schema_version_and_qualified_seed_name(self):
+        path = build_template(seed_two_accounts)
+        self.assertIn(f"-v{database.SCHEMA_VERSION}", path, "Un cambio de esquema debe invalidar las plantillas guardadas.")
+        self.assertNotEqual(path, build_template(OtherSeeds.seed_two_accounts), "Semillas con el mismo nombre no deben compartir plantilla.")
+        clone_template(OtherSeeds.seed_two_accounts)
+        self.assertIsNone(database.get_user("SEED_1"))
+        self.assertEqual(database.get_user("SEED_2").name, "Other Seed")